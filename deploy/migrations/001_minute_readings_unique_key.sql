@@ -0,0 +1,10 @@
+-- Composite unique key on minute_readings so the aggregator can upsert with
+-- INSERT ... ON DUPLICATE KEY UPDATE instead of DELETE + INSERT.
+--
+-- ALTER IGNORE (MariaDB) drops any existing duplicate rows while building the key.
+--
+-- Apply with:
+--   mysql climate < deploy/migrations/001_minute_readings_unique_key.sql
+
+ALTER IGNORE TABLE minute_readings
+    ADD UNIQUE KEY uq_minute_readings (timestamp, source_type, location, sensor_id, metric);
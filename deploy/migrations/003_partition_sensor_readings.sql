@@ -0,0 +1,25 @@
+-- Range-partition sensor_readings by hour so retention cleanup can drop whole
+-- partitions (a metadata operation) instead of DELETEing millions of rows.
+--
+-- The table starts with a single catch-all partition. The aggregator's hourly
+-- cleanup (ReadingsAggregator.cleanup_old_readings) then splits hourly
+-- partitions named pYYYYMMDDHH off pmax a few hours ahead, and drops each one
+-- once it falls outside SENSOR_RETENTION_HOURS. The first hourly partition
+-- it creates also holds all rows that existed before this migration.
+--
+-- MySQL requires every unique key, including the primary key, to contain the
+-- partitioning column. This assumes sensor_readings has an AUTO_INCREMENT id
+-- primary key and a DATETIME timestamp column; adjust the first statement if
+-- the schema differs.
+--
+-- Apply with:
+--   mysql climate < deploy/migrations/003_partition_sensor_readings.sql
+
+ALTER TABLE sensor_readings
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, timestamp);
+
+ALTER TABLE sensor_readings
+    PARTITION BY RANGE (TO_SECONDS(timestamp)) (
+        PARTITION pmax VALUES LESS THAN MAXVALUE
+    );
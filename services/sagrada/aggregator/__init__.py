@@ -7,11 +7,20 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-from .aggregator import ReadingsAggregator
+from .aggregator import DEFAULT_INSERT_CHUNK, ReadingsAggregator
 
 # Default retention: 24 hours of raw sensor data
 DEFAULT_RETENTION_HOURS = 24
 
+# Each tick aggregates only the most recent minute; every CATCHUP_EVERY_TICKS
+# ticks (and on startup) a wider window re-aggregates late-arriving data.
+# Upserts make the overlapping catch-up pass idempotent.
+TICK_WINDOW_MINUTES = 1
+CATCHUP_WINDOW_MINUTES = 5
+CATCHUP_EVERY_TICKS = 5
+
+TICK_SECONDS = 60
+
 
 def main():
     """Entry point for aggregator service."""
@@ -27,13 +36,28 @@ def main():
     logger = get_logger("ReadingsAggregator")
 
     db_config = DBConfig.from_env()
-    aggregator = ReadingsAggregator(db_config)
+
+    # Rows per multi-row INSERT into minute_readings
+    insert_chunk = int(os.environ.get("AGG_INSERT_CHUNK", DEFAULT_INSERT_CHUNK))
+    # Set AGG_INSERT_SELECT=0 to fetch rows into Python instead of INSERT ... SELECT
+    use_insert_select = os.environ.get("AGG_INSERT_SELECT", "1") != "0"
+    aggregator = ReadingsAggregator(
+        db_config,
+        insert_chunk_size=insert_chunk,
+        use_insert_select=use_insert_select,
+    )
 
     # Configurable retention period for raw sensor_readings
     retention_hours = int(os.environ.get("SENSOR_RETENTION_HOURS", DEFAULT_RETENTION_HOURS))
 
     logger.info(f"Starting readings aggregator service (retention: {retention_hours}h)")
 
+    # Align the first deadline to the next wall-clock minute, then advance on the
+    # monotonic clock so NTP/DST jumps can't produce negative or doubled sleeps
+    start = datetime.now()
+    next_deadline = time.monotonic() + TICK_SECONDS - start.second - start.microsecond / 1e6
+
+    tick = 0
     while True:
         now = datetime.now()
 
@@ -41,7 +65,11 @@ def main():
             # Calculate time range for aggregation
             # Truncate to minute boundary for consistent aggregation
             end_time = now.replace(second=0, microsecond=0)
-            start_time = end_time - timedelta(minutes=5)
+            if tick % CATCHUP_EVERY_TICKS == 0:
+                window_minutes = CATCHUP_WINDOW_MINUTES
+            else:
+                window_minutes = TICK_WINDOW_MINUTES
+            start_time = end_time - timedelta(minutes=window_minutes)
 
             logger.info(f"Aggregating data from {start_time} to {end_time}")
             rows_inserted = aggregator.aggregate(start_time, end_time)
@@ -57,12 +85,15 @@ def main():
         except Exception as e:
             logger.error(f"Aggregation cycle failed: {e}")
 
-        # Wait until the next minute
-        next_minute = (datetime.now() + timedelta(minutes=1)).replace(
-            second=0, microsecond=0
-        )
-        sleep_seconds = (next_minute - datetime.now()).total_seconds()
-        time.sleep(sleep_seconds)
+        tick += 1
+
+        # Wait until the next minute, skipping any ticks missed by a slow cycle
+        current = time.monotonic()
+        if next_deadline <= current:
+            missed = int((current - next_deadline) // TICK_SECONDS) + 1
+            next_deadline += missed * TICK_SECONDS
+        time.sleep(next_deadline - current)
+        next_deadline += TICK_SECONDS
 
 
 __all__ = ["ReadingsAggregator", "main"]
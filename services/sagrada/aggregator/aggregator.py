@@ -4,170 +4,303 @@ Aggregates raw sensor_readings into minute_readings for efficient historical que
 """
 
 import logging
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Sequence, Tuple
 
 import pymysql
-from pymysql.cursors import DictCursor
+from pymysql.cursors import DictCursor, SSCursor
 
 from sagrada.shared.database import DBConfig
 from sagrada.shared.disk_check import require_disk_space, DiskFullError
 
 logger = logging.getLogger(__name__)
 
+# Default number of rows per multi-row INSERT statement
+DEFAULT_INSERT_CHUNK = 500
+
+# Raised from the 1024-byte default so end_state's GROUP_CONCAT is never truncated
+SESSION_INIT_SQL = "SET SESSION group_concat_max_len = 65535"
+
+INSERT_PREFIX = (
+    "INSERT INTO minute_readings (timestamp, source_type, location, sensor_id, metric, "
+    "avg_value, min_value, max_value, end_state, sample_count) VALUES "
+)
+ROW_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+# sensor_readings hourly partitions are named pYYYYMMDDHH, plus a pmax catch-all
+PARTITION_NAME_FORMAT = "p%Y%m%d%H"
+PARTITION_AHEAD_HOURS = 3
+PARTITIONS_QUERY = """
+    SELECT PARTITION_NAME
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'sensor_readings'
+      AND PARTITION_NAME IS NOT NULL
+"""
+
+# Re-aggregating a minute overwrites it in place via the composite unique key
+# uq_minute_readings (timestamp, source_type, location, sensor_id, metric)
+ON_DUPLICATE_UPDATE = """
+    ON DUPLICATE KEY UPDATE
+        avg_value = VALUES(avg_value),
+        min_value = VALUES(min_value),
+        max_value = VALUES(max_value),
+        end_state = VALUES(end_state),
+        sample_count = VALUES(sample_count)
+"""
+
 
 def get_aggregation_query() -> str:
-    """Get the SQL query for aggregating sensor readings by minute."""
+    """Get the SQL query for aggregating sensor readings by minute.
+
+    Numeric and non-numeric readings are aggregated by separate SELECTs joined
+    with UNION ALL. Each side filters on metric_type in its WHERE clause, so
+    AVG/MIN/MAX run directly on numeric values without a per-row CASE.
+
+    Rows are bucketed by integer minute (UNIX_TIMESTAMP DIV 60) rather than by
+    formatting a string per row. The last state value per minute is picked with
+    an ordered GROUP_CONCAT in the same GROUP BY pass, avoiding a ROW_NUMBER()
+    window sort. Requires a session group_concat_max_len large enough for a
+    minute of state values.
+
+    Takes named parameters %(start_time)s and %(end_time)s.
+    """
     return """
-    WITH last_readings AS (
-        SELECT
-            DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:%%i:00') as timestamp,
-            source_type,
-            location,
-            sensor_id,
-            metric,
-            metric_type,
-            value,
-            ROW_NUMBER() OVER (PARTITION BY
-                DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:%%i:00'),
-                source_type,
-                location,
-                sensor_id,
-                metric
-                ORDER BY timestamp DESC) as rn
-        FROM sensor_readings
-        WHERE timestamp BETWEEN %s AND %s
-    )
     SELECT
-        l.timestamp,
-        l.source_type,
-        l.location,
-        l.sensor_id,
-        l.metric,
+        FROM_UNIXTIME((UNIX_TIMESTAMP(r.timestamp) DIV 60) * 60) as timestamp,
+        r.source_type,
+        r.location,
+        r.sensor_id,
+        r.metric,
 
         -- Numeric aggregations
-        CASE
-            WHEN l.metric_type = 'numeric'
-            THEN AVG(CAST(l.value AS DECIMAL(10,2)))
-        END as avg_value,
+        AVG(CAST(r.value AS DECIMAL(10,2))) as avg_value,
+        MIN(CAST(r.value AS DECIMAL(10,2))) as min_value,
+        MAX(CAST(r.value AS DECIMAL(10,2))) as max_value,
+        NULL as end_state,
+
+        COUNT(*) as sample_count
 
-        CASE
-            WHEN l.metric_type = 'numeric'
-            THEN MIN(CAST(l.value AS DECIMAL(10,2)))
-        END as min_value,
+    FROM sensor_readings r
+    WHERE r.timestamp BETWEEN %(start_time)s AND %(end_time)s
+      AND r.metric_type = 'numeric'
+    GROUP BY
+        UNIX_TIMESTAMP(r.timestamp) DIV 60,
+        r.source_type,
+        r.location,
+        r.sensor_id,
+        r.metric
 
-        CASE
-            WHEN l.metric_type = 'numeric'
-            THEN MAX(CAST(l.value AS DECIMAL(10,2)))
-        END as max_value,
+    UNION ALL
+
+    SELECT
+        FROM_UNIXTIME((UNIX_TIMESTAMP(r.timestamp) DIV 60) * 60) as timestamp,
+        r.source_type,
+        r.location,
+        r.sensor_id,
+        r.metric,
+        NULL as avg_value,
+        NULL as min_value,
+        NULL as max_value,
 
         -- For state values, take the last reading
-        MAX(CASE
-            WHEN l.metric_type = 'state' AND l.rn = 1
-            THEN l.value
-        END) as end_state,
+        SUBSTRING_INDEX(
+            GROUP_CONCAT(
+                CASE WHEN r.metric_type = 'state' THEN r.value END
+                ORDER BY r.timestamp DESC
+                SEPARATOR 0x1F
+            ),
+            0x1F, 1
+        ) as end_state,
 
         COUNT(*) as sample_count
 
-    FROM last_readings l
+    FROM sensor_readings r
+    WHERE r.timestamp BETWEEN %(start_time)s AND %(end_time)s
+      AND (r.metric_type <> 'numeric' OR r.metric_type IS NULL)
     GROUP BY
-        l.timestamp,
-        l.source_type,
-        l.location,
-        l.sensor_id,
-        l.metric
+        UNIX_TIMESTAMP(r.timestamp) DIV 60,
+        r.source_type,
+        r.location,
+        r.sensor_id,
+        r.metric
+    """
+
+
+def get_aggregation_insert_query() -> str:
+    """Get the INSERT ... SELECT statement that aggregates entirely server-side."""
+    return f"""
+    INSERT INTO minute_readings (
+        timestamp,
+        source_type,
+        location,
+        sensor_id,
+        metric,
+        avg_value,
+        min_value,
+        max_value,
+        end_state,
+        sample_count
+    )
+    SELECT * FROM ({get_aggregation_query()}) AS agg
+    {ON_DUPLICATE_UPDATE}
     """
 
 
+def get_prepared_aggregation_sql() -> str:
+    """Get the INSERT ... SELECT statement in server-side PREPARE syntax."""
+    # Turn every time-range parameter into a ? placeholder, in order of
+    # appearance: start, end for each side of the UNION
+    return get_aggregation_insert_query() % {"start_time": "?", "end_time": "?"}
+
+
 class ReadingsAggregator:
     """Aggregates sensor readings into minute-level summaries."""
 
-    def __init__(self, db_config: DBConfig):
+    def __init__(
+        self,
+        db_config: DBConfig,
+        insert_chunk_size: int = DEFAULT_INSERT_CHUNK,
+        use_insert_select: bool = True,
+    ):
         """Initialize aggregator with database configuration.
 
         Args:
             db_config: Database connection configuration.
+            insert_chunk_size: Maximum rows per multi-row INSERT statement.
+            use_insert_select: Aggregate with a single server-side INSERT ... SELECT.
+                If False, rows are fetched into Python and inserted in chunks.
         """
         self.db_config = db_config
+        self.insert_chunk_size = max(1, insert_chunk_size)
+        self.use_insert_select = use_insert_select
+        self._connection: Optional[pymysql.Connection] = None
+        # Server thread id of the connection agg_stmt was prepared on
+        self._prepared_thread_id: Optional[int] = None
 
-    def _get_connection(self) -> pymysql.Connection:
-        """Create a new database connection."""
+    def _connect(self, cursorclass=DictCursor) -> pymysql.Connection:
+        """Create a new database connection.
+
+        Args:
+            cursorclass: PyMySQL cursor class for the connection.
+        """
         return pymysql.connect(
             host=self.db_config.host,
             user=self.db_config.user,
             password=self.db_config.password,
             database=self.db_config.database,
-            cursorclass=DictCursor,
+            cursorclass=cursorclass,
+            autocommit=False,
+            init_command=SESSION_INIT_SQL,
         )
 
+    def _get_connection(self) -> pymysql.Connection:
+        """Get the long-lived connection, reconnecting if it has dropped."""
+        if self._connection is None or not self._connection.open:
+            self._connection = self._connect()
+        else:
+            self._connection.ping(reconnect=True)
+        return self._connection
+
+    def _discard_connection(self):
+        """Close the cached connection so the next cycle starts fresh."""
+        if self._connection:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+        self._prepared_thread_id = None
+
+    def _ensure_prepared(self, connection: pymysql.Connection, cursor: pymysql.cursors.Cursor):
+        """Prepare agg_stmt once per server session.
+
+        Prepared statements die with the session, so the statement is prepared
+        again whenever the connection has been re-established.
+
+        Args:
+            connection: The long-lived connection.
+            cursor: Cursor on that connection.
+        """
+        thread_id = connection.thread_id()
+        if self._prepared_thread_id != thread_id:
+            cursor.execute("PREPARE agg_stmt FROM %s", (get_prepared_aggregation_sql(),))
+            self._prepared_thread_id = thread_id
+
     def _store_aggregated_data(
-        self, cursor: pymysql.cursors.Cursor, results: List[Dict[str, Any]]
+        self, cursor: pymysql.cursors.Cursor, rows: Sequence[Tuple[Any, ...]]
     ) -> int:
         """Store aggregated data in the minute_readings table.
 
         Args:
             cursor: Database cursor.
-            results: List of aggregated reading dictionaries.
+            rows: Aggregated rows as tuples, in the column order of
+                get_aggregation_query() (which matches the INSERT column order).
 
         Returns:
-            Number of rows inserted/updated.
+            Number of affected rows (1 per insert, 2 per update).
         """
-        if not results:
+        if not rows:
             return 0
 
-        insert_sql = """
-        INSERT INTO minute_readings (
-            timestamp,
-            source_type,
-            location,
-            sensor_id,
-            metric,
-            avg_value,
-            min_value,
-            max_value,
-            end_state,
-            sample_count
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-        )
-        """
+        # Build explicit multi-row INSERTs rather than relying on executemany,
+        # which only batches when the SQL happens to match PyMySQL's regex.
+        affected = 0
+        for i in range(0, len(rows), self.insert_chunk_size):
+            chunk = rows[i:i + self.insert_chunk_size]
+            rows_sql = ",".join(cursor.mogrify(ROW_TEMPLATE, row) for row in chunk)
+            affected += cursor.execute(INSERT_PREFIX + rows_sql + ON_DUPLICATE_UPDATE)
 
-        values = [
-            (
-                row["timestamp"],
-                row["source_type"],
-                row["location"],
-                row["sensor_id"],
-                row["metric"],
-                row["avg_value"],
-                row["min_value"],
-                row["max_value"],
-                row["end_state"],
-                row["sample_count"],
-            )
-            for row in results
-        ]
+        return affected
+
+    def _stream_aggregated_data(
+        self, cursor: pymysql.cursors.Cursor, start_time: datetime, end_time: datetime
+    ) -> int:
+        """Stream aggregated rows from the server and insert them chunk by chunk.
+
+        The SELECT runs on a separate unbuffered tuple (SSCursor) connection so
+        only one chunk of rows is held in memory at a time, and rows are passed
+        straight to the INSERT without repacking.
+
+        Args:
+            cursor: Cursor on the write connection.
+            start_time: Start of time range to aggregate.
+            end_time: End of time range to aggregate.
 
-        cursor.executemany(insert_sql, values)
-        return len(values)
+        Returns:
+            Number of affected rows (1 per insert, 2 per update).
+        """
+        read_connection = self._connect(cursorclass=SSCursor)
+        try:
+            with read_connection.cursor() as read_cursor:
+                read_cursor.execute(
+                    get_aggregation_query(),
+                    {"start_time": start_time, "end_time": end_time},
+                )
+                affected = 0
+                while True:
+                    chunk = read_cursor.fetchmany(self.insert_chunk_size)
+                    if not chunk:
+                        break
+                    affected += self._store_aggregated_data(cursor, chunk)
+                return affected
+        finally:
+            read_connection.close()
 
     def aggregate(self, start_time: datetime, end_time: datetime) -> int:
         """Aggregate sensor readings for a time range.
 
-        Deletes any existing minute_readings in the time range, then inserts
-        fresh aggregations. This avoids duplicates without requiring a
-        composite unique key on the table.
-
-        TODO: This could be more efficient with INSERT ... ON DUPLICATE KEY UPDATE
-        if we add a composite unique key on (timestamp, location, sensor_id, metric).
-        That would require cleaning up existing duplicates first.
+        Upserts fresh aggregations with INSERT ... ON DUPLICATE KEY UPDATE, so
+        re-aggregating an already stored minute is idempotent. Requires the
+        composite unique key from deploy/migrations/001_minute_readings_unique_key.sql.
 
         Args:
             start_time: Start of time range to aggregate.
             end_time: End of time range to aggregate.
 
         Returns:
-            Number of minute_readings records inserted.
+            Number of affected minute_readings rows (MySQL counts 1 per insert,
+            2 per update).
         """
         # Check disk space before writing
         try:
@@ -180,51 +313,129 @@ class ReadingsAggregator:
 
         try:
             with connection.cursor() as cursor:
-                # Delete existing records for this time range
-                delete_sql = """
-                DELETE FROM minute_readings
-                WHERE timestamp >= %s AND timestamp < %s
-                """
-                cursor.execute(delete_sql, (start_time, end_time))
-                deleted = cursor.rowcount
-
-                # Get fresh aggregated data
-                query = get_aggregation_query()
-                cursor.execute(query, (start_time, end_time))
-                results = cursor.fetchall()
-
-                # Insert new aggregated records
-                rows_inserted = self._store_aggregated_data(cursor, results)
+                if self.use_insert_select:
+                    # Aggregate and insert in one prepared statement; rows never
+                    # leave the server and the SQL is parsed once per session
+                    self._ensure_prepared(connection, cursor)
+                    cursor.execute(
+                        "SET @agg_start = %s, @agg_end = %s", (start_time, end_time)
+                    )
+                    cursor.execute(
+                        "EXECUTE agg_stmt USING @agg_start, @agg_end, @agg_start, @agg_end"
+                    )
+                    rows_inserted = cursor.rowcount
+                else:
+                    # Stream fresh aggregated data and insert it in chunks
+                    rows_inserted = self._stream_aggregated_data(cursor, start_time, end_time)
                 connection.commit()
 
-                if deleted > 0:
-                    logger.debug(f"Replaced {deleted} existing records")
-
                 return rows_inserted
 
         except Exception as e:
             logger.error(f"Error during aggregation: {e}")
-            connection.rollback()
+            self._discard_connection()
             raise
-        finally:
-            connection.close()
+
+    def _get_partition_names(self, cursor: pymysql.cursors.Cursor) -> List[str]:
+        """Get the names of sensor_readings' partitions.
+
+        Args:
+            cursor: Database cursor.
+
+        Returns:
+            Partition names, empty if the table is not partitioned.
+        """
+        cursor.execute(PARTITIONS_QUERY)
+        return [row["PARTITION_NAME"] for row in cursor.fetchall()]
+
+    def _maintain_partitions(
+        self, cursor: pymysql.cursors.Cursor, partition_names: List[str], retention_hours: int
+    ) -> int:
+        """Create upcoming hourly partitions and drop expired ones.
+
+        Partition pYYYYMMDDHH holds rows before the end of that hour, so it is
+        dropped once its whole range is older than the retention window.
+
+        Args:
+            cursor: Database cursor.
+            partition_names: Existing partition names.
+            retention_hours: Hours of raw data to retain.
+
+        Returns:
+            Number of partitions dropped.
+        """
+        hours = []
+        for name in partition_names:
+            try:
+                hours.append(datetime.strptime(name, PARTITION_NAME_FORMAT))
+            except ValueError:
+                # pmax or a partition not created by the aggregator
+                continue
+        hours.sort()
+
+        now = datetime.now()
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+
+        # New partitions can only be split off the end (pmax)
+        latest = hours[-1] if hours else current_hour - timedelta(hours=1)
+        new_hours = [
+            current_hour + timedelta(hours=h)
+            for h in range(PARTITION_AHEAD_HOURS + 1)
+            if current_hour + timedelta(hours=h) > latest
+        ]
+        if new_hours:
+            definitions = ", ".join(
+                f"PARTITION {hour.strftime(PARTITION_NAME_FORMAT)} VALUES LESS THAN "
+                f"(TO_SECONDS('{hour + timedelta(hours=1):%Y-%m-%d %H:%M:%S}'))"
+                for hour in new_hours
+            )
+            cursor.execute(
+                f"ALTER TABLE sensor_readings REORGANIZE PARTITION pmax INTO "
+                f"({definitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+            )
+            logger.info(f"Created {len(new_hours)} sensor_readings partitions")
+
+        cutoff = now - timedelta(hours=retention_hours)
+        expired = [hour for hour in hours if hour + timedelta(hours=1) <= cutoff]
+        if expired:
+            names = ", ".join(hour.strftime(PARTITION_NAME_FORMAT) for hour in expired)
+            cursor.execute(f"ALTER TABLE sensor_readings DROP PARTITION {names}")
+            logger.info(
+                f"Dropped {len(expired)} sensor_readings partitions "
+                f"(older than {retention_hours}h)"
+            )
+
+        return len(expired)
 
     def cleanup_old_readings(self, retention_hours: int = 24) -> int:
-        """Delete old sensor_readings that have been aggregated.
+        """Remove old sensor_readings that have been aggregated.
 
         Raw sensor_readings are only needed until they've been aggregated into
         minute_readings. This method removes old data to prevent disk space issues.
 
+        When sensor_readings is range-partitioned by hour (see
+        deploy/migrations/003_partition_sensor_readings.sql), expired hours are
+        removed with DROP PARTITION and upcoming hours are created ahead of
+        time. Unpartitioned tables fall back to a row-level DELETE.
+
         Args:
             retention_hours: Hours of raw data to retain (default 24).
 
         Returns:
-            Number of rows deleted.
+            Number of partitions dropped, or rows deleted if unpartitioned.
         """
         connection = self._get_connection()
 
         try:
             with connection.cursor() as cursor:
+                partition_names = self._get_partition_names(cursor)
+                if partition_names:
+                    dropped = self._maintain_partitions(cursor, partition_names, retention_hours)
+                    # DDL commits implicitly, but the partition lookup alone leaves a
+                    # read transaction open whose snapshot the next cycle would see
+                    connection.commit()
+                    return dropped
+
                 delete_sql = """
                 DELETE FROM sensor_readings
                 WHERE timestamp < DATE_SUB(NOW(), INTERVAL %s HOUR)
@@ -240,7 +451,15 @@ class ReadingsAggregator:
 
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
-            connection.rollback()
+            self._discard_connection()
             raise
-        finally:
-            connection.close()
+
+    def close(self):
+        """Deallocate the prepared statement and close the database connection."""
+        if self._connection and self._prepared_thread_id is not None:
+            try:
+                with self._connection.cursor() as cursor:
+                    cursor.execute("DEALLOCATE PREPARE agg_stmt")
+            except Exception:
+                pass
+        self._discard_connection()
@@ -3,6 +3,7 @@
 import asyncio
 import fnmatch
 import logging
+import re
 import struct
 from dataclasses import dataclass
 from typing import Callable, Dict, List, Optional, Set
@@ -14,6 +15,9 @@ from .config import BLEConfig, CharacteristicConfig, LocationConfig
 
 logger = logging.getLogger(__name__)
 
+# Standard BLE Environmental Sensing encodes temperature/humidity as int16 LE
+INT16_LE = struct.Struct("<h")
+
 
 @dataclass
 class DiscoveredDevice:
@@ -22,6 +26,8 @@ class DiscoveredDevice:
     address: str
     rssi: int
     location_config: Optional[LocationConfig] = None
+    # Scanned bleak device, so connecting doesn't have to rediscover the address
+    ble_device: Optional[BLEDevice] = None
 
 
 class BLEManager:
@@ -52,6 +58,9 @@ class BLEManager:
         self._devices: Dict[str, DiscoveredDevice] = {}
         self._running = False
         self._connection_tasks: Dict[str, asyncio.Task] = {}
+        self._location_cache: Dict[str, Optional[LocationConfig]] = {}
+        # Compile the device name glob once rather than per advertisement
+        self._name_re = re.compile(fnmatch.translate(config.device_pattern))
 
     def _get_location_config(self, device_name: str) -> Optional[LocationConfig]:
         """Get location config for a device based on its name suffix.
@@ -62,12 +71,20 @@ class BLEManager:
         Returns:
             LocationConfig or None if not mapped.
         """
+        try:
+            return self._location_cache[device_name]
+        except KeyError:
+            pass
+
         # Extract suffix (everything after last hyphen)
+        location_config = None
         parts = device_name.split("-")
         if len(parts) > 1:
             suffix = parts[-1]
-            return self.location_mapping.get(suffix)
-        return None
+            location_config = self.location_mapping.get(suffix)
+
+        self._location_cache[device_name] = location_config
+        return location_config
 
     def _parse_characteristic_value(
         self,
@@ -86,7 +103,7 @@ class BLEManager:
         try:
             # Standard BLE Environmental Sensing uses int16 LE for temp/humidity
             if len(data) == 2:
-                raw_value = struct.unpack("<h", data)[0]
+                raw_value = INT16_LE.unpack(data)[0]
                 return raw_value * char_config.scale
             elif len(data) == 1:
                 # uint8 for things like battery
@@ -105,6 +122,7 @@ class BLEManager:
         metric_name: str,
         char_config: CharacteristicConfig,
         location_config: LocationConfig,
+        activity: asyncio.Event,
     ):
         """Create a notification handler for a specific characteristic.
 
@@ -113,15 +131,18 @@ class BLEManager:
             metric_name: Name of the metric (e.g., "temperature").
             char_config: Characteristic configuration.
             location_config: LocationConfig with system and location.
+            activity: Event set on every notification, used as a silence watchdog.
 
         Returns:
             Notification handler function.
         """
         def handler(sender, data: bytearray):
+            activity.set()
             value = self._parse_characteristic_value(char_config, bytes(data))
             if value is not None:
                 logger.debug(
-                    f"Notification from {device_name}: {metric_name}={value}{char_config.unit}"
+                    "Notification from %s: %s=%s%s",
+                    device_name, metric_name, value, char_config.unit,
                 )
                 self.on_reading_callback(
                     device_name, metric_name, location_config.system,
@@ -133,25 +154,45 @@ class BLEManager:
     async def scan_for_devices(self) -> List[DiscoveredDevice]:
         """Scan for BLE devices matching the configured pattern.
 
+        The scan ends as soon as a device has been seen for every entry in
+        the location mapping, or after scan_duration at the latest.
+
         Returns:
             List of discovered devices.
         """
         logger.info(
             f"Scanning for devices matching '{self.config.device_pattern}' "
-            f"for {self.config.scan_duration}s..."
+            f"for up to {self.config.scan_duration}s..."
         )
 
-        scanner = BleakScanner()
+        expected = {(lc.system, lc.location) for lc in self.location_mapping.values()}
+        seen = set()
+        all_seen = asyncio.Event()
+
+        def on_detection(device: BLEDevice, adv_data):
+            if not device.name or not self._name_re.match(device.name):
+                return
+            location_config = self._get_location_config(device.name)
+            if location_config:
+                seen.add((location_config.system, location_config.location))
+                if expected and seen >= expected:
+                    all_seen.set()
+
+        scanner = BleakScanner(detection_callback=on_detection)
         await scanner.start()
-        await asyncio.sleep(self.config.scan_duration)
-        await scanner.stop()
+        try:
+            await asyncio.wait_for(all_seen.wait(), timeout=self.config.scan_duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            await scanner.stop()
 
         # Get devices with advertisement data (includes rssi)
         devices_and_ads = scanner.discovered_devices_and_advertisement_data
 
         discovered = []
         for address, (device, adv_data) in devices_and_ads.items():
-            if device.name and fnmatch.fnmatch(device.name, self.config.device_pattern):
+            if device.name and self._name_re.match(device.name):
                 location_config = self._get_location_config(device.name)
                 rssi = adv_data.rssi if adv_data else -100
                 disc_device = DiscoveredDevice(
@@ -159,6 +200,7 @@ class BLEManager:
                     address=device.address,
                     rssi=rssi,
                     location_config=location_config,
+                    ble_device=device,
                 )
                 discovered.append(disc_device)
                 loc_str = f"{location_config.system}/{location_config.location}" if location_config else "unknown"
@@ -171,7 +213,10 @@ class BLEManager:
         return discovered
 
     async def _connect_and_subscribe(self, device: DiscoveredDevice):
-        """Connect to a device, subscribe to notifications, and poll periodically.
+        """Connect to a device and stream readings from its notifications.
+
+        Reconnects when the device disconnects or stays silent for longer
+        than the configured notify_timeout.
 
         Args:
             device: The device to connect to.
@@ -183,11 +228,21 @@ class BLEManager:
             return
 
         while self._running:
+            # Set on every notification and on disconnect to wake the watchdog
+            activity = asyncio.Event()
+            disconnected = False
+
+            def on_disconnect(_client: BleakClient):
+                nonlocal disconnected
+                disconnected = True
+                activity.set()
+
             try:
                 logger.info(f"Connecting to {device.name} ({device.address})...")
                 client = BleakClient(
-                    device.address,
+                    device.ble_device or device.address,
                     timeout=self.config.connection_timeout,
+                    disconnected_callback=on_disconnect,
                 )
                 await client.connect()
 
@@ -201,7 +256,8 @@ class BLEManager:
                 for metric_name, char_config in self.characteristics.items():
                     try:
                         handler = self._make_notification_handler(
-                            device.name, metric_name, char_config, device.location_config
+                            device.name, metric_name, char_config, device.location_config,
+                            activity,
                         )
                         await client.start_notify(char_config.uuid, handler)
                         logger.info(
@@ -212,33 +268,19 @@ class BLEManager:
                             f"Could not subscribe to {metric_name} on {device.name}: {e}"
                         )
 
-                # Poll periodically while connected (in case notifications are infrequent)
-                poll_interval = 30.0  # seconds
-
-                # Small delay before first poll to let device settle
-                await asyncio.sleep(2.0)
-
-                while self._running and client.is_connected:
-                    # Read all characteristics
-                    for metric_name, char_config in self.characteristics.items():
-                        try:
-                            data = await client.read_gatt_char(char_config.uuid)
-                            if len(data) == 0:
-                                logger.warning(f"Empty data from {device.name}/{metric_name}")
-                                continue
-                            value = self._parse_characteristic_value(char_config, data)
-                            if value is not None:
-                                logger.info(
-                                    f"Poll {device.name}: {metric_name}={value:.2f}{char_config.unit}"
-                                )
-                                self.on_reading_callback(
-                                    device.name, metric_name, device.location_config.system,
-                                    device.location_config.location, value, char_config.unit
-                                )
-                        except Exception as e:
-                            logger.warning(f"Error reading {metric_name} from {device.name}: {e}")
-
-                    await asyncio.sleep(poll_interval)
+                # Wait on notifications; reconnect on disconnect or prolonged silence
+                while self._running and not disconnected:
+                    try:
+                        await asyncio.wait_for(
+                            activity.wait(), timeout=self.config.notify_timeout
+                        )
+                    except asyncio.TimeoutError:
+                        logger.warning(
+                            f"No notifications from {device.name} in "
+                            f"{self.config.notify_timeout}s"
+                        )
+                        break
+                    activity.clear()
 
                 logger.warning(f"Lost connection to {device.name}")
 
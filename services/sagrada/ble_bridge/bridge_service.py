@@ -4,14 +4,23 @@ import asyncio
 import logging
 import signal
 import sys
-from typing import Optional
+import time
+from typing import List, Optional, Tuple
 
 from .ble_manager import BLEManager
 from .config import Config, load_config
-from .mqtt_publisher import MQTTPublisher
+from sagrada.shared.mqtt_publisher import MQTTPublisher
 
 logger = logging.getLogger(__name__)
 
+# Queued readings are published in batches of up to this many...
+PUBLISH_BATCH_SIZE = 32
+# ...or after this many seconds, whichever comes first
+PUBLISH_FLUSH_INTERVAL = 0.1
+
+# (device_name, metric_name, system, location, value, unit)
+QueuedReading = Tuple[str, str, str, str, float, str]
+
 
 class BLEMQTTBridge:
     """Main service that bridges BLE sensors to MQTT."""
@@ -26,6 +35,8 @@ class BLEMQTTBridge:
         self.mqtt_publisher: Optional[MQTTPublisher] = None
         self.ble_manager: Optional[BLEManager] = None
         self._running = False
+        # None on the queue tells the publish task to flush and stop
+        self._reading_queue: Optional["asyncio.Queue[Optional[QueuedReading]]"] = None
 
     def _on_sensor_reading(
         self,
@@ -36,7 +47,7 @@ class BLEMQTTBridge:
         value: float,
         unit: str,
     ):
-        """Handle a sensor reading from BLE.
+        """Queue a sensor reading from BLE for publishing to MQTT.
 
         Args:
             device_name: Name of the BLE device.
@@ -46,20 +57,82 @@ class BLEMQTTBridge:
             value: The sensor value.
             unit: Unit of measurement.
         """
-        if self.mqtt_publisher and self.mqtt_publisher.is_connected:
+        if self._reading_queue is None:
+            logger.warning(
+                f"Bridge not running, dropping reading: {device_name}/{metric_name}={value}"
+            )
+            return
+
+        # Hand off to the publish task so BLE callbacks never block on MQTT
+        self._reading_queue.put_nowait(
+            (device_name, metric_name, system, location, value, unit)
+        )
+
+    def _publish_batch(self, batch: List[QueuedReading]):
+        """Publish a batch of queued readings to MQTT.
+
+        MQTT has no multi-message publish, so each reading is still its own
+        PUBLISH; the batch shares one timestamp and one connection check.
+
+        Args:
+            batch: Readings taken from the queue.
+        """
+        if not self.mqtt_publisher or not self.mqtt_publisher.is_connected:
+            logger.warning(f"MQTT not connected, dropping {len(batch)} readings")
+            return
+
+        building = self.config.defaults.building
+        ts = time.time()
+        for device_name, metric_name, system, location, value, unit in batch:
             self.mqtt_publisher.publish_reading(
-                building=self.config.defaults.building,
+                building=building,
                 system=system,
                 location=location,
                 metric=metric_name,
                 value=value,
                 unit=unit,
                 sensor_id=device_name,
+                ts=ts,
             )
-        else:
-            logger.warning(
-                f"MQTT not connected, dropping reading: {device_name}/{metric_name}={value}"
-            )
+
+    async def _publish_loop(self):
+        """Drain the reading queue, publishing in batches, until a None sentinel arrives."""
+        loop = asyncio.get_running_loop()
+        queue = self._reading_queue
+        stopping = False
+
+        while not stopping:
+            reading = await queue.get()
+            if reading is None:
+                return
+            batch = [reading]
+            deadline = loop.time() + PUBLISH_FLUSH_INTERVAL
+
+            while len(batch) < PUBLISH_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    reading = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if reading is None:
+                    # Publish what has already been taken off the queue, then stop
+                    stopping = True
+                    break
+                batch.append(reading)
+
+            self._publish_batch(batch)
+
+    def _flush_queue(self):
+        """Publish any readings still waiting in the queue."""
+        batch = []
+        while not self._reading_queue.empty():
+            reading = self._reading_queue.get_nowait()
+            if reading is not None:
+                batch.append(reading)
+        if batch:
+            self._publish_batch(batch)
 
     def _setup_signal_handlers(self):
         """Set up signal handlers for graceful shutdown."""
@@ -82,6 +155,10 @@ class BLEMQTTBridge:
             logger.error("Failed to connect to MQTT broker")
             return
 
+        # Start the publish task before BLE readings can arrive
+        self._reading_queue = asyncio.Queue()
+        publish_task = asyncio.create_task(self._publish_loop())
+
         # Initialize BLE manager
         self.ble_manager = BLEManager(
             config=self.config.ble,
@@ -107,6 +184,12 @@ class BLEMQTTBridge:
         if self.ble_manager:
             await self.ble_manager.stop()
 
+        # Let the publish task finish its current batch rather than cancelling it
+        # with readings already taken off the queue; then catch any stragglers
+        self._reading_queue.put_nowait(None)
+        await publish_task
+        self._flush_queue()
+
         if self.mqtt_publisher:
             self.mqtt_publisher.disconnect()
 
@@ -5,10 +5,12 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Optional
 
-import yaml
-
+from sagrada.shared.config import load_yaml_file
 from sagrada.shared.mqtt import MQTTConfig
 
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+_CONFIG_DIR = _REPO_ROOT / "config"
+
 
 @dataclass
 class BLEConfig:
@@ -17,6 +19,7 @@ class BLEConfig:
     scan_interval: float = 300.0
     reconnect_delay: float = 5.0
     connection_timeout: float = 20.0
+    notify_timeout: float = 300.0
     device_pattern: str = "ST-FLORIAN*"
 
 
@@ -65,13 +68,11 @@ def load_config(config_path: Optional[str] = None) -> Config:
     """
     if config_path is None:
         # Look for ble-bridge.yaml in the repo's config directory
-        repo_root = Path(__file__).parent.parent.parent.parent
-        config_path = repo_root / "config" / "ble-bridge.yaml"
+        config_path = _CONFIG_DIR / "ble-bridge.yaml"
     else:
         config_path = Path(config_path)
 
-    with open(config_path, "r") as f:
-        data = yaml.safe_load(f)
+    data = load_yaml_file(config_path)
 
     # Parse MQTT config
     mqtt_data = data.get("mqtt", {})
@@ -88,6 +89,7 @@ def load_config(config_path: Optional[str] = None) -> Config:
         scan_interval=ble_data.get("scan_interval", 300.0),
         reconnect_delay=ble_data.get("reconnect_delay", 5.0),
         connection_timeout=ble_data.get("connection_timeout", 20.0),
+        notify_timeout=ble_data.get("notify_timeout", 300.0),
         device_pattern=ble_data.get("device_pattern", "ST-FLORIAN*"),
     )
 
@@ -1,13 +1,19 @@
 """Sensor data collection service."""
 
+import logging
+
 from .collector import DataCollector
 
+logger = logging.getLogger(__name__)
+
 
 def main():
     """Entry point for collector service."""
     from .config.settings import load_config
     from sagrada.shared.logging import setup_logging
     from sagrada.shared.database import DBConfig
+    from sagrada.shared.mqtt import MQTTConfig
+    from sagrada.shared.mqtt_publisher import MQTTPublisher
 
     import time
 
@@ -16,7 +22,19 @@ def main():
 
     db_config = DBConfig.from_env()
 
-    collector = DataCollector(config.sensors, db_config, config.mqtt)
+    # One MQTT connection for the process, handed to everything that publishes
+    mqtt_publisher = MQTTPublisher(
+        MQTTConfig(
+            broker=config.mqtt.broker,
+            port=config.mqtt.port,
+            client_id="sagrada-collector",
+        ),
+        auto_reconnect=True,
+    )
+    if not mqtt_publisher.connect():
+        logger.warning("MQTT unavailable, readings will not be published in real time")
+
+    collector = DataCollector(config.sensors, db_config, mqtt_publisher)
 
     try:
         while True:
@@ -25,7 +43,8 @@ def main():
     except KeyboardInterrupt:
         pass
     finally:
-        collector.storage.close()
+        collector.close()
+        mqtt_publisher.disconnect()
 
 
 __all__ = ["DataCollector", "main"]
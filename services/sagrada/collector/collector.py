@@ -1,148 +1,159 @@
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import fields
+from typing import Dict, List, Optional, Tuple
 import logging
-import json
 import time
 
-import paho.mqtt.client as mqtt
-from paho.mqtt.enums import CallbackAPIVersion
+import orjson
 
 from sagrada.shared.models import Reading
 from sagrada.shared.database import DBConfig, ReadingsStorage
-from .config.settings import SensorConfigs, MQTTConfig
+from sagrada.shared.mqtt_publisher import MQTTPublisher
+from .config.settings import SensorConfigs
 from .readers.base import SensorReader
+from .readers.kasa import KasaPlugReader
+from .readers.mysql import MySQLReader
 
 logger = logging.getLogger(__name__)
 
-class DataCollector:
-    _singleton_readers = {}
+# Pre-encoded fragments of the numeric payload {"value":<float>,"ts":<float>}
+NUMERIC_PAYLOAD_PREFIX = b'{"value":'
+NUMERIC_PAYLOAD_TS = b',"ts":'
 
+class DataCollector:
     # Define reader types and their corresponding classes
     READER_TYPES = {
-        'kasa': '.readers.kasa.KasaPlugReader',
-        'mysql': '.readers.mysql.MySQLReader'
+        'kasa': KasaPlugReader,
+        'mysql': MySQLReader,
     }
 
-    def __init__(self, sensor_configs: SensorConfigs, db_config: DBConfig, mqtt_config: Optional[MQTTConfig] = None):
+    # MQTT topic per published source type; other source types are not published
+    TOPIC_TEMPLATES = {
+        'kasa': "kasa/{location}/{metric}",
+        # MySQL readings (like target_temp)
+        'mysql': "shed/control/{location}/{metric}",
+    }
+
+    def __init__(self, sensor_configs: SensorConfigs, db_config: DBConfig, mqtt_publisher: Optional[MQTTPublisher] = None):
         self.readers = {}
         self.storage = ReadingsStorage(db_config)
         self.db_config = db_config
-        self.mqtt_client: Optional[mqtt.Client] = None
-        self._mqtt_connected = False
-
-        # Initialize MQTT client if config provided
-        if mqtt_config:
-            self._init_mqtt(mqtt_config)
+        # Publisher is owned (connected and disconnected) by the caller
+        self.mqtt_publisher = mqtt_publisher
+        # Topic per (source_type, location, metric); None for unpublished source types
+        self._topic_cache: Dict[Tuple[str, str, str], Optional[str]] = {}
 
         # Initialize readers based on configuration
-        for reader_type, config in sensor_configs.__dict__.items():
+        for f in fields(sensor_configs):
+            reader_type = f.name
+            config = getattr(sensor_configs, reader_type)
             if config:  # Only process if configuration exists
-                if reader_type not in self._singleton_readers:
-                    self._singleton_readers[reader_type] = self._create_reader(reader_type, config)
-                self.readers[reader_type] = self._singleton_readers[reader_type]
-
-        logger.info(f"Initialized DataCollector with {len(self.readers)} readers")
-
-    def _init_mqtt(self, config: MQTTConfig):
-        """Initialize MQTT client for publishing readings."""
-        try:
-            self.mqtt_client = mqtt.Client(
-                callback_api_version=CallbackAPIVersion.VERSION2,
-                client_id="sagrada-collector"
-            )
+                self.readers[reader_type] = self._create_reader(reader_type, config)
 
-            def on_connect(client, userdata, flags, reason_code, properties):
-                if reason_code == 0:
-                    logger.info(f"Connected to MQTT broker at {config.broker}:{config.port}")
-                    self._mqtt_connected = True
-                else:
-                    logger.error(f"Failed to connect to MQTT: {reason_code}")
+        # Readers are I/O bound, so one worker each lets a cycle take max() not sum()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.readers)),
+            thread_name_prefix="collector-reader",
+        )
 
-            def on_disconnect(client, userdata, disconnect_flags, reason_code, properties):
-                self._mqtt_connected = False
-                if reason_code != 0:
-                    logger.warning(f"MQTT disconnected: {reason_code}")
-
-            self.mqtt_client.on_connect = on_connect
-            self.mqtt_client.on_disconnect = on_disconnect
-
-            self.mqtt_client.connect(config.broker, config.port, keepalive=60)
-            self.mqtt_client.loop_start()
+        logger.info(f"Initialized DataCollector with {len(self.readers)} readers")
 
-        except Exception as e:
-            logger.error(f"Failed to initialize MQTT: {e}")
-            self.mqtt_client = None
-    
     def _create_reader(self, reader_type: str, config):
         """Create a new reader instance based on type"""
         if reader_type not in self.READER_TYPES:
             raise ValueError(f"Unsupported reader type: {reader_type}")
             
-        # Import and instantiate the reader class dynamically
-        module_path = self.READER_TYPES[reader_type]
-        module_name, class_name = module_path.rsplit('.', 1)
+        reader_class = self.READER_TYPES[reader_type]
 
-        full_module_path = f"sagrada.collector{module_name}"
-        reader_class = getattr(__import__(full_module_path, fromlist=[class_name]), class_name)
-        
         # Pass db_config to MySQL reader
         if reader_type == 'mysql':
             return reader_class(config, self.db_config)
         return reader_class(config)
 
+    @classmethod
+    def _build_topic(cls, source_type: str, location: str, metric: str) -> Optional[str]:
+        """Return the MQTT topic for a reading shape, or None if it is not published."""
+        template = cls.TOPIC_TEMPLATES.get(source_type)
+        if template is None:
+            return None
+        return template.format(location=location, metric=metric)
+
     def _publish_readings_to_mqtt(self, readings: List[Reading]):
         """Publish readings to MQTT for real-time UI updates."""
-        if not self._mqtt_connected or not self.mqtt_client:
+        if not self.mqtt_publisher or not self.mqtt_publisher.is_connected:
             return
 
+        dumps = orjson.dumps
+        prefix = NUMERIC_PAYLOAD_PREFIX
+        ts_suffix = NUMERIC_PAYLOAD_TS + dumps(time.time()) + b'}'
+        topic_cache = self._topic_cache
+        build_topic = self._build_topic
+
+        # Resolve topics and split state from numeric readings in one pass, so
+        # the payload loops below carry no per-reading branching
+        state_readings = []
+        numeric_readings = []
         for reading in readings:
-            # Determine topic based on source type
-            if reading.source_type == 'kasa':
-                # Kasa devices: kasa/{location}/{metric}
-                topic = f"kasa/{reading.location}/{reading.metric}"
-            elif reading.source_type == 'mysql':
-                # MySQL readings (like target_temp): shed/control/{location}/{metric}
-                topic = f"shed/control/{reading.location}/{reading.metric}"
-            else:
+            metric = reading.metric
+            key = (reading.source_type, reading.location, metric)
+            try:
+                topic = topic_cache[key]
+            except KeyError:
+                topic = topic_cache[key] = build_topic(*key)
+            if topic is None:
                 # Skip unknown source types
                 continue
-
-            # Format payload based on metric type
-            if reading.metric == 'state':
-                # Convert "true"/"false" to "on"/"off"
-                payload = 'on' if reading.value.lower() == 'true' else 'off'
+            if metric == 'state':
+                state_readings.append((topic, reading.value))
             else:
-                # Numeric values as JSON
-                try:
-                    payload = json.dumps({
-                        "value": float(reading.value),
-                        "ts": time.time()
-                    })
-                except (ValueError, TypeError):
-                    # Skip non-numeric values
-                    continue
-
-            result = self.mqtt_client.publish(topic, payload, qos=0)
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.debug(f"Published to {topic}: {payload}")
-            else:
-                logger.warning(f"Failed to publish to {topic}: rc={result.rc}")
+                numeric_readings.append((topic, reading.value))
+
+        # Build every message first so publishing is just paho calls
+        # State values "true"/"false" are published as "on"/"off"
+        messages = [
+            (topic, 'on' if value.lower() == 'true' else 'off')
+            for topic, value in state_readings
+        ]
+        # Numeric values as JSON
+        for topic, value in numeric_readings:
+            try:
+                messages.append((topic, prefix + dumps(float(value)) + ts_suffix))
+            except (ValueError, TypeError):
+                # Skip non-numeric values
+                continue
+
+        failed = self.mqtt_publisher.publish_messages(messages, qos=0)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Published %d readings to MQTT", len(messages) - len(failed))
+        if failed:
+            logger.warning(f"Failed to publish {len(failed)} readings to MQTT: {failed}")
+
+    def _collect_one(self, name: str, reader: SensorReader) -> List[Reading]:
+        """Health-check and read a single reader, returning [] on any failure."""
+        logger.info(f"Collecting from {name}")
+        try:
+            if not reader.check_health():
+                logger.warning(f"Reader {reader.__class__.__name__} failed health check")
+                return []
+
+            readings = reader.get_readings()
+            logger.debug("Got %d readings from %s", len(readings), reader.__class__.__name__)
+            return readings
+        except Exception as e:
+            logger.error(f"Failed to collect from {reader.__class__.__name__}: {e}")
+            return []
 
     def collect_and_store(self):
         all_readings = []
 
-        # Collect from all readers
-        for name, reader in self.readers.items():
-            logger.info(f"Collecting from {name}")
-            try:
-                if not reader.check_health():
-                    logger.warning(f"Reader {reader.__class__.__name__} failed health check")
-                    continue
-
-                readings = reader.get_readings()
-                logger.debug(f"Got {len(readings)} readings from {reader.__class__.__name__}")
-                all_readings.extend(readings)
-            except Exception as e:
-                logger.error(f"Failed to collect from {reader.__class__.__name__}: {e}")
+        # Collect from all readers concurrently
+        futures = [
+            self._executor.submit(self._collect_one, name, reader)
+            for name, reader in self.readers.items()
+        ]
+        for future in as_completed(futures):
+            all_readings.extend(future.result())
 
         if all_readings:
             try:
@@ -152,4 +163,14 @@ class DataCollector:
                 logger.error(f"Failed to store readings: {e}")
 
             # Publish readings to MQTT for real-time updates
-            self._publish_readings_to_mqtt(all_readings)
\ No newline at end of file
+            self._publish_readings_to_mqtt(all_readings)
+
+    def close(self):
+        """Stop the reader pool and release reader and database resources."""
+        self._executor.shutdown(wait=True)
+        for name, reader in self.readers.items():
+            try:
+                reader.close()
+            except Exception as e:
+                logger.warning(f"Failed to close reader {name}: {e}")
+        self.storage.close()
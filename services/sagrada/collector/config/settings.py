@@ -1,12 +1,20 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+import functools
+import logging
 from typing import List, Optional, Dict, Any
-import yaml
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from sagrada.shared.config import load_yaml_file
 from sagrada.shared.database import DBConfig
 
+_REPO_ROOT = Path(__file__).resolve().parents[4]
+_CONFIG_DIR = _REPO_ROOT / "config"
+_ENV_PATH = _CONFIG_DIR / ".env"
+
+logger = logging.getLogger(__name__)
+
 @dataclass
 class KasaDevice:
     alias: str
@@ -36,6 +44,8 @@ class MySQLQuery:
 @dataclass
 class MySQLConfig:
     queries: List[MySQLQuery]
+    # Send all queries in one round trip; needs a server that allows multi-statements
+    multi_statements: bool = False
 
 @dataclass
 class SensorConfigs:
@@ -59,69 +69,82 @@ class Config:
         if self.mqtt is None:
             self.mqtt = MQTTConfig()
 
+@functools.lru_cache(maxsize=1)
+def _ensure_env_loaded():
+    """Load the repo's config/.env once per process"""
+    load_dotenv(_ENV_PATH)
+
 def get_environment() -> str:
     """Get the current environment name from .env or environment variables"""
-    repo_root = Path(__file__).parent.parent.parent.parent.parent
-    env_path = repo_root / "config" / ".env"
-    load_dotenv(env_path)
+    _ensure_env_loaded()
     return os.getenv('CLIMATE_ENV', 'sagrada')
 
+# Sensor section name -> (section config class, item class, item key).
+# A mapping of items becomes a dict keyed by item id, a list stays a list.
+SENSOR_SECTIONS = {
+    'kasa': (KasaConfig, KasaDevice, 'devices'),
+    'mysql': (MySQLConfig, MySQLQuery, 'queries'),
+}
+
+def _resolve_config_path(env: str) -> Path:
+    """Find config-{env}.yaml in the repo's config directory or the current directory"""
+    # Look for config in the repo's config directory
+    # repo_root/config/config-{env}.yaml
+    config_path = _CONFIG_DIR / f"config-{env}.yaml"
+
+    if not config_path.exists():
+        # Fallback to current directory
+        config_path = Path(f'config-{env}.yaml')
+
+    if not config_path.exists():
+        raise FileNotFoundError(
+            f"No config file found at {config_path}. "
+            f"Create a config-{env}.yaml file for this installation."
+        )
+    return config_path
+
+def _parse_sensor_section(section_data: Dict[str, Any], config_cls, item_cls, item_key: str):
+    """Build a sensor section config from its raw YAML data"""
+    raw_items = section_data[item_key]
+    if isinstance(raw_items, dict):
+        items = {item_id: item_cls(**item) for item_id, item in raw_items.items()}
+    else:
+        items = [item_cls(**item) for item in raw_items]
+    # Any other keys in the section are plain config options; unknown ones are
+    # ignored so a stray key doesn't stop the collector from starting
+    known = {f.name for f in fields(config_cls)}
+    options = {}
+    for key, value in section_data.items():
+        if key == item_key:
+            continue
+        if key in known:
+            options[key] = value
+        else:
+            logger.warning(f"Ignoring unknown option '{key}' in {config_cls.__name__} config")
+    return config_cls(**{item_key: items}, **options)
+
 def load_config(path: Optional[str] = None) -> Config:
     """Load configuration from YAML file with environment variable support"""
-    # Load environment variables from repo config directory
-    repo_root = Path(__file__).parent.parent.parent.parent.parent
-    env_path = repo_root / "config" / ".env"
-    load_dotenv(env_path)
-
     env = get_environment()
 
     if path is None:
-        # Look for config in the repo's config directory
-        # repo_root/config/config-{env}.yaml
-        repo_root = Path(__file__).parent.parent.parent.parent.parent
-        config_path = repo_root / "config" / f"config-{env}.yaml"
-
-        if not config_path.exists():
-            # Fallback to current directory
-            config_path = Path(f'config-{env}.yaml')
-
-        if not config_path.exists():
-            raise FileNotFoundError(
-                f"No config file found at {config_path}. "
-                f"Create a config-{env}.yaml file for this installation."
-            )
-        path = str(config_path)
+        path = str(_resolve_config_path(env))
     
     # Load main config
-    with open(path) as f:
-        config_data = yaml.safe_load(f)
+    config_data = load_yaml_file(path)
     
     # Add database config from environment variables
     config_data['db_config'] = DBConfig.from_env()
 
-    # Convert sensor configs
+    # Convert sensor configs for each section present
     sensor_data = config_data.get('sensors', {})
-    
-    # Initialize sensor configs
     sensor_configs = SensorConfigs()
-    
-    # Handle Kasa devices if present
-    if 'kasa' in sensor_data:
-        kasa_data = sensor_data['kasa']
-        kasa_devices = {
-            device_id: KasaDevice(**device_config)
-            for device_id, device_config in kasa_data['devices'].items()
-        }
-        sensor_configs.kasa = KasaConfig(devices=kasa_devices)
-    
-    # Handle MySQL queries if present
-    if 'mysql' in sensor_data:
-        mysql_data = sensor_data['mysql']
-        mysql_queries = [
-            MySQLQuery(**query_config)
-            for query_config in mysql_data['queries']
-        ]
-        sensor_configs.mysql = MySQLConfig(queries=mysql_queries)
+    for section, (config_cls, item_cls, item_key) in SENSOR_SECTIONS.items():
+        if section in sensor_data:
+            setattr(
+                sensor_configs, section,
+                _parse_sensor_section(sensor_data[section], config_cls, item_cls, item_key),
+            )
     
     # Handle MQTT config if present
     mqtt_config = MQTTConfig()
@@ -21,3 +21,7 @@ class SensorReader(ABC):
     def check_health(self) -> bool:
         """Basic health check - can we talk to our sensors?"""
         pass
+
+    def close(self):
+        """Release any resources held by the reader."""
+        pass
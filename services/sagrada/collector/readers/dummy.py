@@ -1,3 +1,4 @@
+import functools
 import random
 from datetime import datetime
 from typing import List, Dict
@@ -48,7 +49,8 @@ class DummyReader(SensorReader):
     
     def get_readings(self) -> List[Reading]:
         readings = []
-        now = datetime.now()
+        # Positional args: (sensor_id, location, metric, metric_type, value)
+        make_reading = functools.partial(Reading, datetime.now(), 'dummy')
         
         # Generate temperature readings
         for location in self.config.get('temperature', []):
@@ -57,14 +59,8 @@ class DummyReader(SensorReader):
                 base_value=22.0,  # room temperature in Celsius
                 variation=0.5
             )
-            readings.append(Reading(
-                timestamp=now,
-                source_type='dummy',
-                sensor_id=location,
-                metric='temperature',
-                metric_type='numeric',
-                value=str(round(value, 1)),
-                location=None
+            readings.append(make_reading(
+                location, None, 'temperature', 'numeric', str(round(value, 1))
             ))
         
         # Generate humidity readings
@@ -74,14 +70,8 @@ class DummyReader(SensorReader):
                 base_value=50.0,  # 50% humidity
                 variation=2.0
             )
-            readings.append(Reading(
-                timestamp=now,
-                source_type='dummy',
-                sensor_id=location,
-                metric='humidity',
-                metric_type='numeric',
-                value=str(round(value, 1)),
-                location=None
+            readings.append(make_reading(
+                location, None, 'humidity', 'numeric', str(round(value, 1))
             ))
         
         # Generate boolean state readings
@@ -90,14 +80,8 @@ class DummyReader(SensorReader):
             if random.random() < 0.1:
                 self.boolean_states[location] = not self.boolean_states[location]
             
-            readings.append(Reading(
-                timestamp=now,
-                source_type='dummy',
-                sensor_id=location,
-                metric='state',
-                metric_type='state',
-                value=str(self.boolean_states[location]).lower(),
-                location=None
+            readings.append(make_reading(
+                location, None, 'state', 'state', str(self.boolean_states[location]).lower()
             ))
         
         return readings
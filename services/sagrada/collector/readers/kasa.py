@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import logging
 from typing import List, Dict
 from datetime import datetime
@@ -26,7 +27,11 @@ class KasaPlugReader(SensorReader):
         logger.info(f"Initialized KasaPlugReader with {len(self.device_configs)} devices")
 
     def _get_loop(self):
-        """Get or create an event loop"""
+        """Get or create the reader's event loop
+
+        Discovered devices keep connections bound to the loop they were created
+        on, so the sync entry points reuse this one loop instead of asyncio.run().
+        """
         if self._loop is None:
             self._loop = asyncio.new_event_loop()
             asyncio.set_event_loop(self._loop)
@@ -43,60 +48,27 @@ class KasaPlugReader(SensorReader):
                         self.devices[device_id] = (device, device_config.location)
                         logger.info(f"Found {device_config.alias} at {addr}")
 
-    async def _get_readings(self) -> List[Reading]:
-        """Get readings from all devices"""
+    async def get_readings_async(self) -> List[Reading]:
+        """Get readings from all devices, for callers already running an event loop"""
         await self._init_devices()
         readings = []
-        now = datetime.now()
+        # Positional args: (sensor_id, location, metric, metric_type, value)
+        make_reading = functools.partial(Reading, datetime.now(), 'kasa')
 
         for device_id, (device, location) in self.devices.items():
             try:
                 await device.update()
                 
-                # Power reading
-                readings.append(Reading(
-                    timestamp=now,
-                    source_type='kasa',
-                    sensor_id=device.mac,
-                    metric='power',
-                    metric_type='numeric',
-                    value=str(device.emeter_realtime.power),
-                    location=location
-                ))
-                
-                # Voltage reading
-                readings.append(Reading(
-                    timestamp=now,
-                    source_type='kasa',
-                    sensor_id=device.mac,
-                    metric='voltage',
-                    metric_type='numeric',
-                    value=str(device.emeter_realtime.voltage),
-                    location=location
-                ))
-                
-                # Current reading
-                readings.append(Reading(
-                    timestamp=now,
-                    source_type='kasa',
-                    sensor_id=device.mac,
-                    metric='current',
-                    metric_type='numeric',
-                    value=str(device.emeter_realtime.current),
-                    location=location
-                ))
-                
-                # State reading
-                readings.append(Reading(
-                    timestamp=now,
-                    source_type='kasa',
-                    sensor_id=device.mac,
-                    metric='state',
-                    metric_type='state',
-                    value=str(device.is_on).lower(),
-                    location=location
-                ))
-                
+                # emeter_realtime is a property; read it once per device
+                emeter = device.emeter_realtime
+                mac = device.mac
+                readings.extend([
+                    make_reading(mac, location, 'power', 'numeric', str(emeter.power)),
+                    make_reading(mac, location, 'voltage', 'numeric', str(emeter.voltage)),
+                    make_reading(mac, location, 'current', 'numeric', str(emeter.current)),
+                    make_reading(mac, location, 'state', 'state', str(device.is_on).lower()),
+                ])
+
             except Exception as e:
                 logger.error(f"Failed to read Kasa plug {device_id}: {e}")
 
@@ -105,14 +77,23 @@ class KasaPlugReader(SensorReader):
     def get_readings(self) -> List[Reading]:
         """Synchronously get readings from all devices"""
         loop = self._get_loop()
-        return loop.run_until_complete(self._get_readings())
+        return loop.run_until_complete(self.get_readings_async())
 
-    def check_health(self) -> bool:
+    async def check_health_async(self) -> bool:
         """Check if we can connect to at least one device"""
         try:
-            loop = self._get_loop()
-            devices = loop.run_until_complete(kasa.Discover.discover())
+            devices = await kasa.Discover.discover()
             return len(devices) > 0
         except Exception as e:
             logger.error(f"Health check failed: {e}")
             return False
+
+    def check_health(self) -> bool:
+        """Synchronously check if we can connect to at least one device"""
+        return self._get_loop().run_until_complete(self.check_health_async())
+
+    def close(self):
+        """Close the reader's private event loop"""
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
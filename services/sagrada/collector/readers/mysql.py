@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import List, Dict, Any
+import functools
+from typing import List, Dict, Any, Optional
 import logging
 import re
 import pymysql
+from pymysql.constants import CLIENT
 
 from sagrada.shared.models import Reading
 from sagrada.shared.database import DBConfig
@@ -15,22 +17,11 @@ class MySQLReader(SensorReader):
     # Regex pattern to match the start of SQL queries (case insensitive)
     ALLOWED_QUERY_PATTERN = re.compile(r'^\s*SELECT\s+', re.IGNORECASE)
     
-    # SQL commands that are definitely not allowed (case insensitive)
-    FORBIDDEN_PATTERNS = [
-        re.compile(pattern, re.IGNORECASE) for pattern in [
-            r'\bINSERT\b',
-            r'\bUPDATE\b',
-            r'\bDELETE\b',
-            r'\bDROP\b',
-            r'\bTRUNCATE\b',
-            r'\bALTER\b',
-            r'\bCREATE\b',
-            r'\bREPLACE\b',
-            r'\bGRANT\b',
-            r'\bREVOKE\b',
-            r'\bUNION\b',
-        ]
-    ]
+    # SQL commands that are definitely not allowed (case insensitive), as one alternation
+    FORBIDDEN_RE = re.compile(
+        r'\b(?:INSERT|UPDATE|DELETE|DROP|TRUNCATE|ALTER|CREATE|REPLACE|GRANT|REVOKE|UNION)\b',
+        re.IGNORECASE,
+    )
 
     def __init__(self, config: MySQLConfig, db_config: DBConfig):
         """
@@ -41,67 +32,114 @@ class MySQLReader(SensorReader):
             db_config: Database configuration from the collector
         """
         self.db_config = db_config
+        self.multi_statements = config.multi_statements
+        self._connection = None
         self.queries = []
         # Validate each query during initialization
         for query_config in config.queries:
-            if self._validate_query(query_config.query):
-                self.queries.append(query_config)
-            else:
+            if not self._validate_query(query_config.query):
                 logger.error(f"Rejecting invalid or unsafe query: {query_config.query[:100]}...")
+            elif self.multi_statements and ';' in query_config.query.rstrip().rstrip(';'):
+                # With multi-statements on, an embedded ';' would run a second statement
+                logger.error(f"Rejecting query with multiple statements: {query_config.query[:100]}...")
+            else:
+                self.queries.append(query_config)
         
         logger.info(f"Initialized MySQLReader with {len(self.queries)} valid queries")
     
     def _get_connection(self):
-        """Get a new database connection using the collector's configuration"""
-        return pymysql.connect(
-            host=self.db_config.host,
-            user=self.db_config.user,
-            password=self.db_config.password,
-            database=self.db_config.database,
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        """Get the reader's long-lived connection, reconnecting if it has dropped"""
+        if self._connection is None or not self._connection.open:
+            # autocommit so each poll sees current data rather than a stale snapshot
+            self._connection = pymysql.connect(
+                host=self.db_config.host,
+                user=self.db_config.user,
+                password=self.db_config.password,
+                database=self.db_config.database,
+                cursorclass=pymysql.cursors.DictCursor,
+                autocommit=True,
+                client_flag=CLIENT.MULTI_STATEMENTS if self.multi_statements else 0,
+            )
+        else:
+            self._connection.ping(reconnect=True)
+        return self._connection
+
+    def _discard_connection(self):
+        """Drop the cached connection so the next call reconnects"""
+        if self._connection:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
     
-    def _validate_query(self, query: str) -> bool:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _query_rejection(query: str) -> Optional[str]:
         """
-        Validate that a query is safe to execute.
-        Returns True if the query is valid and safe, False otherwise.
+        Return the reason a query is unsafe to execute, or None if it is allowed.
+        Memoized, so it must stay free of side effects such as logging.
         """
         # Check if query starts with SELECT
-        if not self.ALLOWED_QUERY_PATTERN.match(query):
-            logger.error("Query must start with SELECT")
-            return False
+        if not MySQLReader.ALLOWED_QUERY_PATTERN.match(query):
+            return "Query must start with SELECT"
             
         # Check for forbidden SQL commands
-        for pattern in self.FORBIDDEN_PATTERNS:
-            if pattern.search(query):
-                logger.error(f"Query contains forbidden SQL command: {pattern.pattern}")
-                return False
+        match = MySQLReader.FORBIDDEN_RE.search(query)
+        if match:
+            return f"Query contains forbidden SQL command: {match.group(0).upper()}"
         
+        return None
+
+    @staticmethod
+    def _validate_query(query: str) -> bool:
+        """
+        Validate that a query is safe to execute.
+        Returns True if the query is valid and safe, False otherwise.
+        """
+        reason = MySQLReader._query_rejection(query)
+        if reason is not None:
+            logger.error(reason)
+            return False
         return True
     
+    def _run_queries(self, cursor):
+        """Execute the configured queries, yielding each one's result rows in order"""
+        if not self.queries:
+            return
+
+        if not self.multi_statements:
+            for query_config in self.queries:
+                # Execute query with parameters if provided
+                cursor.execute(query_config.query, query_config.params or [])
+                yield cursor.fetchall()
+            return
+
+        # One round trip: bind each query's parameters client-side and send them together
+        combined = ";\n".join(
+            cursor.mogrify(query_config.query.rstrip().rstrip(';'), query_config.params or [])
+            for query_config in self.queries
+        )
+        cursor.execute(combined)
+        while True:
+            yield cursor.fetchall()
+            if not cursor.nextset():
+                break
+
     def get_readings(self) -> List[Reading]:
         readings = []
-        now = datetime.now()
-        connection = None
+        # Positional args: (sensor_id, location, metric, metric_type, value)
+        make_reading = functools.partial(Reading, datetime.now(), 'mysql')
         
         try:
             connection = self._get_connection()
             with connection.cursor() as cursor:
-                for query_config in self.queries:
-                    # Execute query with parameters if provided
-                    cursor.execute(query_config.query, query_config.params or [])
-                    results = cursor.fetchall()
-                    
+                for query_config, results in zip(self.queries, self._run_queries(cursor)):
                     if not results:
                         # If no results, create a null reading
-                        readings.append(Reading(
-                            timestamp=now,
-                            source_type='mysql',
-                            sensor_id=query_config.sensor_id,
-                            metric=query_config.metric,
-                            metric_type=query_config.metric_type,
-                            value='null',
-                            location=query_config.location
+                        readings.append(make_reading(
+                            query_config.sensor_id, query_config.location,
+                            query_config.metric, query_config.metric_type, 'null'
                         ))
                         continue
 
@@ -109,28 +147,21 @@ class MySQLReader(SensorReader):
                     for row in results:
                         value = row[query_config.value_column]
                         if value is not None:  # Skip null values
-                            readings.append(Reading(
-                                timestamp=now,
-                                source_type='mysql',
-                                sensor_id=query_config.sensor_id,
-                                metric=query_config.metric,
-                                metric_type=query_config.metric_type,
-                                value=str(round(float(value), 1)) if query_config.metric_type == 'numeric' else str(value),
-                                location=query_config.location
+                            readings.append(make_reading(
+                                query_config.sensor_id, query_config.location,
+                                query_config.metric, query_config.metric_type,
+                                format(float(value), '.1f') if query_config.metric_type == 'numeric' else str(value)
                             ))
             
             return readings
             
         except Exception as e:
             logger.error(f"Error reading from MySQL: {e}")
+            self._discard_connection()
             return []
-        finally:
-            if connection:
-                connection.close()
     
     def check_health(self) -> bool:
         """Check if we can connect to the database and execute a simple query"""
-        connection = None
         try:
             connection = self._get_connection()
             with connection.cursor() as cursor:
@@ -139,7 +170,9 @@ class MySQLReader(SensorReader):
             return True
         except Exception as e:
             logger.error(f"MySQL health check failed: {e}")
+            self._discard_connection()
             return False
-        finally:
-            if connection:
-                connection.close() 
\ No newline at end of file
+
+    def close(self):
+        """Close the reader's database connection"""
+        self._discard_connection() 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 import logging
 import aiohttp
 import asyncio
@@ -11,25 +11,60 @@ logger = logging.getLogger(__name__)
 class SmartPlugReader(SensorReader):
     def __init__(self, device_ips: List[str]):
         self.device_ips = device_ips
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         logger.info(f"Initialized SmartPlugReader with {len(device_ips)} devices")
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get or create the reader's event loop
+
+        The shared session is bound to the loop it was created on, so the sync
+        entry points reuse one loop rather than asyncio.run() per call.
+        """
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop
+
+    async def _poll_all(self) -> list:
+        """Fetch every plug's status concurrently; failures are returned as exceptions"""
+        return await asyncio.gather(
+            *[self._get_plug_data(ip) for ip in self.device_ips],
+            return_exceptions=True
+        )
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use
+
+        Must be called from a coroutine: the session binds to the running loop.
+        One session keeps plug connections alive between polls.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=max(1, len(self.device_ips)),
+                    keepalive_timeout=60,
+                )
+            )
+        return self._session
     
     async def _get_plug_data(self, ip: str) -> dict:
         # Implementation depends on your smart plug API
         # This is a placeholder
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"http://{ip}/status") as response:
-                return await response.json()
+        async with self._get_session().get(f"http://{ip}/status") as response:
+            return await response.json()
+
+    async def close_async(self):
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
     
-    def get_readings(self) -> List[Reading]:
+    async def get_readings_async(self) -> List[Reading]:
         readings = []
         now = datetime.now()
         
         # Run all API calls concurrently
-        loop = asyncio.get_event_loop()
-        plug_data = loop.run_until_complete(asyncio.gather(
-            *[self._get_plug_data(ip) for ip in self.device_ips],
-            return_exceptions=True
-        ))
+        plug_data = await self._poll_all()
         
         for ip, data in zip(self.device_ips, plug_data):
             try:
@@ -55,11 +90,17 @@ class SmartPlugReader(SensorReader):
         
         return readings
     
+    def get_readings(self) -> List[Reading]:
+        return self._get_loop().run_until_complete(self.get_readings_async())
+    
     def check_health(self) -> bool:
         # Consider healthy if we can reach at least one plug
-        loop = asyncio.get_event_loop()
-        results = loop.run_until_complete(asyncio.gather(
-            *[self._get_plug_data(ip) for ip in self.device_ips],
-            return_exceptions=True
-        ))
-        return any(not isinstance(r, Exception) for r in results)
\ No newline at end of file
+        results = self._get_loop().run_until_complete(self._poll_all())
+        return any(not isinstance(r, Exception) for r in results)
+
+    def close(self):
+        """Close the shared HTTP session and the reader's event loop"""
+        if self._loop is not None:
+            self._loop.run_until_complete(self.close_async())
+            self._loop.close()
+            self._loop = None
@@ -1,63 +1,208 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 import logging
 from datetime import datetime
+from pathlib import Path
 import asyncio
+import json
 import time
 import kasa
-import pymysql
 
 from sagrada.shared.models import Reading
 from sagrada.shared.database import DBConfig, ReadingsStorage
 from sagrada.collector.config.settings import KasaConfig
+from .decisions import Readings, States, Targets, decide
 
 logger = logging.getLogger(__name__)
 
+# Plug addresses change far less often than plug state, so discovery results are
+# cached (alias -> (ip, expiry as wall-clock ns)) and persisted across restarts.
+DISCOVERY_TTL_NS = 3600 * 10**9
+DISCOVERY_CACHE_PATH = Path.home() / '.cache' / 'sagrada' / 'kasa.json'
+_DISCOVERY_CACHE: Dict[str, Tuple[str, int]] = {}
+_discovery_cache_loaded = False
+
+# Discovery attempts per get_device call, with exponential backoff between them
+DISCOVERY_ATTEMPTS = 4
+DISCOVERY_RETRY_DELAY = 0.5
+DISCOVERY_RETRY_BACKOFF = 1.5
+MAX_DISCOVERY_RETRY_DELAY = 5.0
+
+# How often the controller cross-checks its device states against the database
+STATE_CHECK_INTERVAL_NS = 60 * 10**9
+
+# How often every plug is re-queried; otherwise only plugs toggled this cycle are
+FULL_SYNC_INTERVAL_NS = 300 * 10**9
+
+# Control loop interval, widened by POLL_BACKOFF per quiet cycle up to MAX_POLL_INTERVAL
+POLL_INTERVAL = 30
+MAX_POLL_INTERVAL = 120
+POLL_BACKOFF = 1.5
+
+# Minimum seconds between toggles before a plug may be switched on/off again
+TOGGLE_ON_COOLDOWN = 180
+TOGGLE_OFF_COOLDOWN = 600
+
+# Queued readings are written in batches of up to this many...
+READING_BATCH_SIZE = 500
+# ...or after this many seconds, whichever comes first
+READING_FLUSH_INTERVAL = 5.0
+# Readings beyond this backlog are dropped rather than growing without bound
+READING_QUEUE_SIZE = 10000
+
+def _cached_address(alias: str) -> Optional[str]:
+    """Return the cached, unexpired address for a plug alias"""
+    global _discovery_cache_loaded
+    if not _discovery_cache_loaded:
+        _discovery_cache_loaded = True
+        try:
+            data = json.loads(DISCOVERY_CACHE_PATH.read_text())
+            _DISCOVERY_CACHE.update({a: (ip, int(expiry)) for a, (ip, expiry) in data.items()})
+        except (OSError, ValueError, TypeError) as e:
+            logger.debug("No usable Kasa discovery cache: %s", e)
+
+    entry = _DISCOVERY_CACHE.get(alias)
+    if entry and entry[1] > time.time_ns():
+        return entry[0]
+    return None
+
+def _update_discovery_cache(devices: Dict[str, 'kasa.SmartDevice']):
+    """Record every discovered plug and persist the cache if it changed"""
+    expiry = time.time_ns() + DISCOVERY_TTL_NS
+    changed = False
+    for addr, dev in devices.items():
+        if _DISCOVERY_CACHE.get(dev.alias, (None,))[0] != addr:
+            changed = True
+        _DISCOVERY_CACHE[dev.alias] = (addr, expiry)
+
+    if changed:
+        _save_discovery_cache()
+
+def _forget_cached_address(alias: str, addr: str):
+    """Drop a plug's cached address, e.g. once another plug answers there"""
+    if _DISCOVERY_CACHE.get(alias, (None,))[0] == addr:
+        del _DISCOVERY_CACHE[alias]
+        _save_discovery_cache()
+
+def _save_discovery_cache():
+    """Persist the discovery cache for the next run"""
+    try:
+        DISCOVERY_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        DISCOVERY_CACHE_PATH.write_text(json.dumps(_DISCOVERY_CACHE))
+    except OSError as e:
+        logger.warning("Failed to persist Kasa discovery cache: %s", e)
+
+def _seconds_since(mono_ns: Optional[int]) -> float:
+    """Seconds elapsed since a time.monotonic_ns() stamp, infinite if never set"""
+    if mono_ns is None:
+        return float('inf')
+    return (time.monotonic_ns() - mono_ns) / 1e9
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    """Parse a stored reading value, returning None for missing or invalid values"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
 class KasaDevice:
     def __init__(self, device_name: str):
         self.device = None
         self.device_name = device_name
         self.switch_status = None
-        self.time_last_toggled_ns = 0
-        self.time_updated_ns = 0
-        self.time_attempted_update_ns = 0
+        # Monotonic timestamps (None = never), immune to wall-clock jumps
+        self.mono_last_toggled_ns: Optional[int] = None
+        self.mono_updated_ns: Optional[int] = None
+        self.mono_attempted_update_ns: Optional[int] = None
+        # Address of the last successful connection, and direct reconnects failed since
+        self.last_known_ip: Optional[str] = None
+        self.failed_reconnects = 0
+
+    async def _connect(self, addr: str) -> bool:
+        """Connect directly to an address, skipping the discovery broadcast
+
+        Fails if a different plug answers there (e.g. after a DHCP reshuffle);
+        the address is then forgotten so the next attempt rediscovers.
+        """
+        try:
+            device = kasa.SmartPlug(addr)
+            await device.update()
+        except Exception as e:
+            logger.info("Connecting to %s at %s failed: %s", self.device_name, addr, e)
+            return False
+
+        if device.alias != self.device_name:
+            logger.warning("Expected %s at %s but found %s", self.device_name, addr, device.alias)
+            _forget_cached_address(self.device_name, addr)
+            if addr == self.last_known_ip:
+                # Our current handle points at the other plug too; stop using it
+                self.device = None
+                self.last_known_ip = None
+            return False
+
+        self.device = device
+        self.last_known_ip = addr
+        self.mono_updated_ns = time.monotonic_ns()
+        self.switch_status = device.is_on
+        logger.info("Connected to %s at %s", self.device_name, addr)
+        return True
 
-    async def get_device(self, attempt: int = 0):
+    async def _connect_cached(self) -> bool:
+        """Connect directly to the cached address for this alias"""
+        addr = _cached_address(self.device_name)
+        return addr is not None and await self._connect(addr)
+
+    async def get_device(self):
         """Discover and connect to the Kasa device"""
-        logger.info(f"Discovering Kasa devices, looking for {self.device_name}")
-        devices = await kasa.Discover.discover()
-        logger.debug(f"Found {len(devices)} devices")
-        
-        for addr, dev in devices.items():
-            if dev.alias == self.device_name:
-                self.device = kasa.SmartPlug(addr)
-                logger.info(f"Found {self.device_name} at {addr}")
-                await self.update()
+        if await self._connect_cached():
+            return
+
+        delay = DISCOVERY_RETRY_DELAY
+        for attempt in range(DISCOVERY_ATTEMPTS):
+            logger.info("Discovering Kasa devices, looking for %s", self.device_name)
+            devices = await kasa.Discover.discover()
+            logger.debug("Found %s devices", len(devices))
+            _update_discovery_cache(devices)
+            
+            for addr, dev in devices.items():
+                if dev.alias == self.device_name:
+                    self.device = kasa.SmartPlug(addr)
+                    self.last_known_ip = addr
+                    logger.info("Found %s at %s", self.device_name, addr)
+                    await self.update()
+                    return
+            
+            # Keep an existing connection rather than retrying discovery
+            if self.device is not None or attempt == DISCOVERY_ATTEMPTS - 1:
                 return
-                
-        if self.device is None:
-            logger.warning(f"Failed to find {self.device_name}, retrying in 5 seconds")
-            await asyncio.sleep(5)
-            if attempt < 3:  # Limit retries
-                await self.get_device(attempt + 1)
+            logger.warning("Failed to find %s, retrying in %.1f seconds", self.device_name, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * DISCOVERY_RETRY_BACKOFF, MAX_DISCOVERY_RETRY_DELAY)
+
+    def cooldown_remaining(self, turn_on: bool) -> float:
+        """Seconds until the device may be switched on (or off) again"""
+        cooldown = TOGGLE_ON_COOLDOWN if turn_on else TOGGLE_OFF_COOLDOWN
+        return max(0.0, cooldown - _seconds_since(self.mono_last_toggled_ns))
 
     async def switch_on(self) -> bool:
         """Turn the device on, respecting cooldown period"""
         if self.switch_status:
             return True
 
-        seconds_since_last_toggle = (time.time_ns() - self.time_last_toggled_ns) / 1e9
-        if seconds_since_last_toggle < 180:  # 3 minute cooldown
-            logger.info(f"Not toggling {self.device_name}, last toggle {seconds_since_last_toggle:.1f}s ago")
+        seconds_since_last_toggle = _seconds_since(self.mono_last_toggled_ns)
+        if seconds_since_last_toggle < TOGGLE_ON_COOLDOWN:
+            logger.info("Not toggling %s, last toggle %.1fs ago", self.device_name, seconds_since_last_toggle)
             return False
             
         try:
-            logger.info(f"Turning on {self.device_name}")
-            self.time_last_toggled_ns = time.time_ns()
+            logger.info("Turning on %s", self.device_name)
+            self.mono_last_toggled_ns = time.monotonic_ns()
             await self.device.turn_on()
             await self.update()
             return True
         except Exception as e:
-            logger.error(f"Failed to turn on {self.device_name}: {e}")
+            logger.error("Failed to turn on %s: %s", self.device_name, e)
             return False
 
     async def switch_off(self) -> bool:
@@ -65,36 +210,45 @@ class KasaDevice:
         if self.switch_status is False:
             return True
 
-        seconds_since_last_toggle = (time.time_ns() - self.time_last_toggled_ns) / 1e9
-        if seconds_since_last_toggle < 600:  # 10 minute cooldown
-            logger.info(f"Not toggling {self.device_name}, last toggle {seconds_since_last_toggle:.1f}s ago")
+        seconds_since_last_toggle = _seconds_since(self.mono_last_toggled_ns)
+        if seconds_since_last_toggle < TOGGLE_OFF_COOLDOWN:
+            logger.info("Not toggling %s, last toggle %.1fs ago", self.device_name, seconds_since_last_toggle)
             return False
             
         try:
-            logger.info(f"Turning off {self.device_name}")
-            self.time_last_toggled_ns = time.time_ns()
+            logger.info("Turning off %s", self.device_name)
+            self.mono_last_toggled_ns = time.monotonic_ns()
             await self.device.turn_off()
             await self.update()
             return True
         except Exception as e:
-            logger.error(f"Failed to turn off {self.device_name}: {e}")
+            logger.error("Failed to turn off %s: %s", self.device_name, e)
             return False
 
     async def update(self):
         """Update device status"""
         try:
             await self.device.update()
-            self.time_updated_ns = time.time_ns()
+            self.mono_updated_ns = time.monotonic_ns()
             self.switch_status = self.device.is_on
             return True
         except Exception as e:
-            logger.error(f"Failed to update {self.device_name}: {e}")
+            logger.error("Failed to update %s: %s", self.device_name, e)
             # Try to reconnect if we haven't updated in 30 seconds
-            if (time.time_ns() - self.time_updated_ns > 30e9 and 
-                self.time_attempted_update_ns < time.time_ns() - 30e9):
-                logger.info(f"Attempting to reconnect to {self.device_name}")
-                self.time_attempted_update_ns = time.time_ns()
-                await self.get_device()
+            if (_seconds_since(self.mono_updated_ns) > 30 and
+                _seconds_since(self.mono_attempted_update_ns) > 30):
+                logger.info("Attempting to reconnect to %s", self.device_name)
+                self.mono_attempted_update_ns = time.monotonic_ns()
+                # Reconnect to the known address first; only rediscover once that
+                # has failed twice in a row, or at once if another plug now has it
+                if self.last_known_ip is not None:
+                    if await self._connect(self.last_known_ip):
+                        self.failed_reconnects = 0
+                        return True
+                    self.failed_reconnects += 1
+                if self.last_known_ip is None or self.failed_reconnects >= 2:
+                    self.failed_reconnects = 0
+                    await self.get_device()
             return False
 
 class HeatingController:
@@ -132,6 +286,9 @@ class HeatingController:
 
     ALL_MONITORED_LOCATIONS = PIPE_LOCATIONS + CRITICAL_LOCATIONS
 
+    # Kasa-controlled components
+    COMPONENTS = ('pump', 'heater', 'fan')
+
     def __init__(self, db_config: DBConfig, kasa_config: KasaConfig):
         self.db_config = db_config
         self.kasa_config = kasa_config
@@ -144,6 +301,27 @@ class HeatingController:
         
         # Initialize Kasa devices
         self.devices = {}
+
+        # Current control loop interval, see POLL_INTERVAL, and the wait before
+        # the next fetch (shortened while a cooldown holds back a toggle)
+        self._poll_interval = POLL_INTERVAL
+        self._next_wait = POLL_INTERVAL
+
+        # Last time device states were cross-checked against the database (None = never,
+        # so the first cycle checks even if monotonic time is still small after boot)
+        self._last_state_check_ns: Optional[int] = None
+
+        # Components toggled during the current cycle, and the last full plug sweep
+        # (None = never, so the first cycle sweeps)
+        self._toggled_this_cycle = set()
+        self._last_full_sync_ns: Optional[int] = None
+
+        # Readings are written by a background task so the control loop never
+        # waits on the database; both are created once the event loop is running
+        self._reading_queue: Optional["asyncio.Queue[Optional[Reading]]"] = None
+        self._storage_lock: Optional[asyncio.Lock] = None
+        self._fetched_readings: Optional[asyncio.Queue] = None
+        self._reschedule: Optional[asyncio.Event] = None
         
         # Target temperatures and thresholds
         self.default_desk_temp = 40  # Add a default temperature
@@ -152,6 +330,21 @@ class HeatingController:
         self.temp_threshold = 1.0  # Temperature threshold for control decisions
         self.freeze_prevention_temp = 40  # Temperature at which to start freeze prevention
 
+        # Control sensor IDs and metric names never change, so build them once
+        locations = self.ALL_MONITORED_LOCATIONS + [self.LOCATION_SYSTEM] + [
+            device.location for device in kasa_config.devices.values()
+        ]
+        self._sensor_ids = {loc: f"{self.SOURCE_CONTROLLER}_{loc}" for loc in locations}
+        metric_keys = [(self.METRIC_CONTROL_STATE, c) for c in self.COMPONENTS]
+        metric_keys += [(self.METRIC_TARGET_TEMP, 'tank'), ('critical_temp_f', 'tank')]
+        self._control_metrics = {(base, c): f"{base}_{c}" for base, c in metric_keys}
+
+        # The controller polls the same temperatures and thermostat target every cycle
+        self._current_readings_specs = [
+            (self.ALL_MONITORED_LOCATIONS, [self.METRIC_TEMPERATURE]),
+            ([self.LOCATION_ROOM], [self.METRIC_TARGET_TEMP]),
+        ]
+
     @property
     def critical_tank_temp(self) -> float:
         """The minimum temperature we'll allow the tank to reach.
@@ -160,32 +353,39 @@ class HeatingController:
 
     def get_control_sensor_id(self, location: str) -> str:
         """Generate a unique sensor ID for control metrics"""
-        return f"{self.SOURCE_CONTROLLER}_{location}"
+        sensor_id = self._sensor_ids.get(location)
+        if sensor_id is None:
+            sensor_id = self._sensor_ids[location] = f"{self.SOURCE_CONTROLLER}_{location}"
+        return sensor_id
 
     def get_control_metric(self, base_metric: str, component: str) -> str:
         """Generate a unique metric name for control values"""
-        return f"{base_metric}_{component}"
+        key = (base_metric, component)
+        metric = self._control_metrics.get(key)
+        if metric is None:
+            metric = self._control_metrics[key] = f"{base_metric}_{component}"
+        return metric
 
     async def initialize_devices(self):
         """Initialize all Kasa devices"""
-        for component in ['pump', 'heater', 'fan']:
+        for component in self.COMPONENTS:
             device_config = self.kasa_config.get_device(component)
             if device_config:
                 self.devices[component] = KasaDevice(device_config.alias)
-                await self.devices[component].get_device()
-                # Initialize our internal state from the actual device state
-                if self.devices[component].switch_status is not None:
-                    if component == 'pump':
-                        self.pump_state = self.devices[component].switch_status
-                    elif component == 'heater':
-                        self.heater_state = self.devices[component].switch_status
-                    elif component == 'fan':
-                        self.fan_state = self.devices[component].switch_status
-                    logger.info(f"Initialized {component} state to {self.devices[component].switch_status}")
             else:
-                logger.error(f"No configuration found for {component}")
+                logger.error("No configuration found for %s", component)
+
+        # Discover all devices concurrently rather than one broadcast at a time
+        await asyncio.gather(*(device.get_device() for device in self.devices.values()))
 
-    async def control_component(self, component: str, desired_state: bool):
+        for component, device in self.devices.items():
+            # Initialize our internal state from the actual device state
+            if device.switch_status is not None:
+                setattr(self, f"{component}_state", device.switch_status)
+                logger.info("Initialized %s state to %s", component, device.switch_status)
+
+    async def control_component(self, component: str, desired_state: bool,
+                                now: Optional[datetime] = None):
         """Control a Kasa component's state and log the action"""
         try:
             # Get the device config and device
@@ -193,7 +393,7 @@ class HeatingController:
             device = self.devices.get(component)
             
             if not device_config or not device:
-                logger.error(f"No configuration or device found for component: {component}")
+                logger.error("No configuration or device found for component: %s", component)
                 return
             
             # Control the device
@@ -203,259 +403,338 @@ class HeatingController:
                 
             # Log the control action with unique sensor_id and metric
             reading = Reading(
-                timestamp=datetime.now(),
+                timestamp=now or datetime.now(),
                 source_type='controller',
-                sensor_id=self.get_control_sensor_id(device_config.location),
+                sensor_id=self._sensor_ids[device_config.location],
                 location=device_config.location,
-                metric=self.get_control_metric(self.METRIC_CONTROL_STATE, component),
+                metric=self._control_metrics[self.METRIC_CONTROL_STATE, component],
                 metric_type='state',
                 value='on' if desired_state else 'off'
             )
-            self.storage.store_readings([reading])
+            self.queue_reading(reading)
             
             # Update internal state
+            self._toggled_this_cycle.add(component)
             setattr(self, f"{component}_state", desired_state)
-            logger.info(f"Set {component} to {'on' if desired_state else 'off'}")
+            logger.info("Set %s to %s", component, 'on' if desired_state else 'off')
             
         except Exception as e:
-            logger.error(f"Failed to control {component}: {e}")
-
-    def _get_connection(self):
-        """Create and return a new database connection"""
-        return pymysql.connect(
-            host=self.db_config.host,
-            user=self.db_config.user,
-            password=self.db_config.password,
-            database=self.db_config.database,
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        
+            logger.error("Failed to control %s: %s", component, e)
+
+    def queue_reading(self, reading: Reading):
+        """Queue a reading for the background writer"""
+        try:
+            self._reading_queue.put_nowait(reading)
+        except asyncio.QueueFull:
+            logger.warning("Reading queue full, dropping %s for %s", reading.metric, reading.location)
+
+    async def _run_storage(self, func, *args):
+        """Run a blocking storage call off the event loop
+
+        The storage shares one PyMySQL connection, so calls are serialized.
+        """
+        async with self._storage_lock:
+            return await asyncio.to_thread(func, *args)
+
+    async def _write_loop(self):
+        """Drain the reading queue, writing in batches, until a None sentinel arrives"""
+        loop = asyncio.get_running_loop()
+        queue = self._reading_queue
+        stopping = False
+
+        while not stopping:
+            reading = await queue.get()
+            if reading is None:
+                return
+            batch = [reading]
+            deadline = loop.time() + READING_FLUSH_INTERVAL
+
+            while len(batch) < READING_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    reading = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if reading is None:
+                    stopping = True
+                    break
+                batch.append(reading)
+
+            try:
+                await self._run_storage(self.storage.store_readings, batch)
+            except Exception as e:
+                logger.error("Failed to write %s readings: %s", len(batch), e)
+
     def get_current_readings(self) -> Dict[str, float]:
         """Get current temperature readings from the database"""
         try:
-            logger.info(f"Getting current readings for {self.ALL_MONITORED_LOCATIONS} with metrics {self.METRIC_TEMPERATURE}")
-            readings = self.storage.get_current_readings(
-                locations=self.ALL_MONITORED_LOCATIONS,
-                metrics=[self.METRIC_TEMPERATURE]
+            logger.info("Getting current readings for %s with metrics %s", self.ALL_MONITORED_LOCATIONS, self.METRIC_TEMPERATURE)
+            # Temperatures and the thermostat target in a single round trip
+            readings = self.storage.get_current_readings_multi(
+                self._current_readings_specs, exclude_null=True
             )
             
             # Convert to dictionary of location: value (converting C to F)
-            readings_dict = {}
-            for reading in readings:
-                if reading.value and reading.value.lower() != 'null':
-                    temp_c = float(reading.value)
-                    temp_f = temp_c * 9.0 / 5.0 + 32.0
-                    readings_dict[reading.location] = temp_f
-            
-            # Get target temperature from thermostat
-            thermostat_readings = self.storage.get_current_readings(
-                locations=[self.LOCATION_ROOM],
-                metrics=[self.METRIC_TARGET_TEMP]
-            )
+            readings_dict = {
+                location: temp_c * 9.0 / 5.0 + 32.0
+                for (location, metric), r in readings.items()
+                if metric == self.METRIC_TEMPERATURE
+                and (temp_c := _parse_float(r.value)) is not None
+            }
             
-            # Use default if no valid reading
-            if thermostat_readings and thermostat_readings[0].value and thermostat_readings[0].value.lower() != 'null':
-                try:
-                    self.target_desk_temp = float(thermostat_readings[0].value)
-                except (ValueError, TypeError):
-                    logger.warning(f"Invalid target temperature value: {thermostat_readings[0].value}, using default {self.default_desk_temp}F")
-                    self.target_desk_temp = self.default_desk_temp
+            # Use default if no valid thermostat reading
+            thermostat_reading = readings.get((self.LOCATION_ROOM, self.METRIC_TARGET_TEMP))
+            target_temp = _parse_float(thermostat_reading.value) if thermostat_reading else None
+            if target_temp is not None:
+                self.target_desk_temp = target_temp
+            elif thermostat_reading:
+                logger.warning("Invalid target temperature value: %s, using default %sF", thermostat_reading.value, self.default_desk_temp)
+                self.target_desk_temp = self.default_desk_temp
             else:
                 if self.target_desk_temp != self.default_desk_temp:
-                    logger.info(f"No target temperature set, using default {self.default_desk_temp}F")
+                    logger.info("No target temperature set, using default %sF", self.default_desk_temp)
                 self.target_desk_temp = self.default_desk_temp
                 
             return readings_dict
             
         except Exception as e:
-            logger.error(f"Failed to get current readings: {e}")
+            logger.error("Failed to get current readings: %s", e)
             return {}
             
-    def evaluate_room_heating_need(self, desk_temp: float) -> tuple[bool, str]:
-        """Evaluate if the room needs heating and why"""
-        if desk_temp < self.target_desk_temp:
-            return True, f"Room temperature ({desk_temp:.1f}F) below target ({self.target_desk_temp:.1f}F)"
-        return False, f"Room temperature ({desk_temp:.1f}F) at or above target ({self.target_desk_temp:.1f}F)"
-
-    def evaluate_tank_heating_need(self, tank_temp: float, need_room_heat: bool) -> tuple[bool, str]:
-        """Evaluate if tank needs heating, with different behaviors for room heating vs freeze prevention.
-        
-        When room heating is needed:
-            - Heat tank to target temperature (self.target_tank_temp)
-        When room heating is not needed:
-            - Only heat if tank is below freeze prevention temperature
-        """
-        # If we need room heat, maintain the target tank temperature
-        if need_room_heat:
-            if tank_temp < self.target_tank_temp:
-                return True, f"Tank temperature ({tank_temp:.1f}F) below target ({self.target_tank_temp:.1f}F) and room needs heat"
-            return False, f"Tank temperature ({tank_temp:.1f}F) sufficient for room heating (>= {self.target_tank_temp:.1f}F)"
-            
-        # If we don't need room heat, only prevent freezing
-        if tank_temp < self.freeze_prevention_temp:
-            return True, f"Tank temperature ({tank_temp:.1f}F) approaching freezing (< {self.freeze_prevention_temp:.1f}F)"
-        
-        return False, f"Tank temperature ({tank_temp:.1f}F) above freeze prevention threshold ({self.freeze_prevention_temp:.1f}F), no heating needed"
-
-    def can_heat_from_tank(self, tank_temp: float) -> tuple[bool, str]:
-        """Evaluate if the tank has enough stored energy to heat effectively"""
-        if tank_temp >= (self.target_tank_temp - self.temp_threshold):
-            return True, f"Tank temperature ({tank_temp:.1f}F) sufficient for heating (>= {self.target_tank_temp-self.temp_threshold:.1f}F)"
-        return False, f"Tank temperature ({tank_temp:.1f}F) too low for effective heating (< {self.target_tank_temp-self.temp_threshold:.1f}F)"
-    
-    def check_pipe_freeze_risk(self, readings: Dict[str, float]) -> tuple[bool, str]:
-        """Check pipe temperatures for freeze risk"""
-        for location in self.PIPE_LOCATIONS:
-            temp = readings.get(location)
-            if temp and temp < self.freeze_prevention_temp:
-                return True, f"{location} temperature ({temp:.1f}F) below freeze prevention threshold ({self.freeze_prevention_temp:.1f}F)"
-        return False, "No freeze risk in pipes (all temperatures above freeze prevention threshold)"
-            
     def get_device_states(self) -> Dict[str, bool]:
-        """Get current device states from the database"""
+        """Get current device states from the database
+
+        Only reads; runs off the event loop, so the decide loop applies the result.
+        """
         try:
             readings = self.storage.get_current_readings(
                 locations=['pump', 'heater', 'fan'],
                 metrics=['state']
             )
             
-            states = {}
-            for reading in readings:
-                states[reading.location] = reading.value.lower() == 'true'
-                
-                # Update internal state if it doesn't match
-                component = reading.location
-                internal_state = getattr(self, f"{component}_state")
-                if states[component] != internal_state:
-                    logger.warning(f"{component} state mismatch: internal={internal_state}, actual={states[component]}")
-                    setattr(self, f"{component}_state", states[component])
-                    
-            return states
+            return {reading.location: reading.value.lower() == 'true' for reading in readings}
             
         except Exception as e:
-            logger.error(f"Failed to get device states: {e}")
+            logger.error("Failed to get device states: %s", e)
             return {}
 
+    def _reconcile_device_states(self, states: Dict[str, bool], fetched_ns: int):
+        """Adopt database device states that disagree with ours, on the event loop
+
+        States of components toggled since the fetch are newer than the database
+        row, so those are left alone.
+        """
+        for component, state in states.items():
+            internal_state = getattr(self, f"{component}_state", None)
+            if internal_state is None or state == internal_state:
+                continue
+            device = self.devices.get(component)
+            toggled_ns = device.mono_last_toggled_ns if device is not None else None
+            if toggled_ns is not None and toggled_ns >= fetched_ns:
+                continue
+            logger.warning("%s state mismatch: internal=%s, actual=%s", component, internal_state, state)
+            setattr(self, f"{component}_state", state)
+
     async def control_loop(self):
         """Main control loop for the heating system"""
-        await self.initialize_devices()
+        self._reading_queue = asyncio.Queue(maxsize=READING_QUEUE_SIZE)
+        self._storage_lock = asyncio.Lock()
+        # Fetched (readings, target desk temp, database device states or None, monotonic
+        # fetch time); the latest fetch replaces an unconsumed one
+        self._fetched_readings = asyncio.Queue(maxsize=1)
+        self._reschedule = asyncio.Event()
+        write_task = asyncio.create_task(self._write_loop())
+        try:
+            await self.initialize_devices()
+            await asyncio.gather(self._fetch_loop(), self._decide_loop())
+        finally:
+            # Stop the writer only once it has written everything queued before
+            # the sentinel, so a write is never cut off mid-flight
+            if not write_task.done():
+                await self._reading_queue.put(None)
+                await write_task
+
+    async def _wait_for_next_cycle(self, started: float):
+        """Sleep until the current poll interval has passed since started
+
+        The decide loop may shorten or lengthen the interval meanwhile, and
+        signals that through _reschedule.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            remaining = self._next_wait - (loop.time() - started)
+            if remaining <= 0:
+                return
+            self._reschedule.clear()
+            try:
+                await asyncio.wait_for(self._reschedule.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    async def _fetch_loop(self):
+        """Fetch readings on the poll schedule and hand them to the decide loop"""
+        loop = asyncio.get_running_loop()
+        queue = self._fetched_readings
+        _mono = time.monotonic_ns
+        
+        while True:
+            started = loop.time()
+            try:
+                # The in-memory states are authoritative and reconciled against the
+                # plugs each cycle, so the database is only cross-checked once a minute.
+                # Storage calls are blocking PyMySQL, so run them off the event loop.
+                fetched_ns = _mono()
+                device_states = None
+                if (self._last_state_check_ns is None or
+                        fetched_ns - self._last_state_check_ns > STATE_CHECK_INTERVAL_NS):
+                    self._last_state_check_ns = fetched_ns
+                    device_states = await self._run_storage(self.get_device_states)
+                
+                readings = await self._run_storage(self.get_current_readings)
+                if queue.full():
+                    # Keep an unconsumed state check rather than waiting a minute for the next
+                    _, _, dropped_states, dropped_ns = queue.get_nowait()
+                    if device_states is None and dropped_states is not None:
+                        device_states, fetched_ns = dropped_states, dropped_ns
+                queue.put_nowait((readings, self.target_desk_temp, device_states, fetched_ns))
+            except Exception as e:
+                logger.error("Error fetching readings: %s", e)
+            
+            await self._wait_for_next_cycle(started)
+
+    async def _decide_loop(self):
+        """Decide on and apply component states for each batch of fetched readings"""
+        # Bind the per-cycle callables to locals once
+        _now = datetime.now
+        _mono = time.monotonic_ns
+        queue = self._fetched_readings
         
         while True:
+            readings, target_desk_temp, device_states, fetched_ns = await queue.get()
+            self._next_wait = POLL_INTERVAL
             try:
-                # Get device states from database instead of polling
-                device_states = self.get_device_states()
+                if device_states:
+                    self._reconcile_device_states(device_states, fetched_ns)
+                
+                # One timestamp for every reading produced this cycle
+                now = _now()
                 
-                readings = self.get_current_readings()
-                if not readings or self.target_desk_temp is None:
-                    logger.info(f"Readings: {readings}")
-                    logger.info(f"Target desk temp: {self.target_desk_temp}")
+                if not readings or target_desk_temp is None:
+                    logger.info("Readings: %s", readings)
+                    logger.info("Target desk temp: %s", target_desk_temp)
                     logger.warning("Missing required readings or target temperature")
                     # Log what specifically is missing
                     missing_readings = [loc for loc in self.ALL_MONITORED_LOCATIONS if loc not in readings]
-                    logger.warning(f"Missing readings: {missing_readings}")
-                    await asyncio.sleep(30)
+                    logger.warning("Missing readings: %s", missing_readings)
                     continue
                     
-                desk_temp = readings.get(self.LOCATION_DESK)
-                tank_temp = readings.get(self.LOCATION_TANK)
+                get = readings.get
+                desk_temp, tank_temp, floor_temp, input_temp, output_temp, pre_tank_temp = (
+                    get(self.LOCATION_DESK),
+                    get(self.LOCATION_TANK),
+                    get(self.LOCATION_FLOOR),
+                    get(self.LOCATION_HEATER_INPUT),
+                    get(self.LOCATION_HEATER_OUTPUT),
+                    get(self.LOCATION_PRE_TANK),
+                )
                 
-                if not all([desk_temp, tank_temp]):
+                if desk_temp is None or tank_temp is None:
                     logger.warning("Missing critical temperature readings")
-                    await asyncio.sleep(30)
                     continue
                 
-                # Energy transfer path 1: Tank → Distribution
-                # Check both comfort heating and freeze prevention needs
-                need_room_heat, room_reason = self.evaluate_room_heating_need(desk_temp)
-                can_heat_room, tank_capacity_reason = self.can_heat_from_tank(tank_temp)
-                pipe_freeze_risk, freeze_reason = self.check_pipe_freeze_risk(readings)
-                
-                # Energy transfer path 2: Heater → Tank
-                need_tank_heat, tank_reason = self.evaluate_tank_heating_need(tank_temp, need_room_heat)
+                decision = decide(
+                    Readings(desk_temp, tank_temp, floor_temp, (
+                        (self.LOCATION_HEATER_INPUT, input_temp),
+                        (self.LOCATION_FLOOR, floor_temp),
+                        (self.LOCATION_HEATER_OUTPUT, output_temp),
+                        (self.LOCATION_PRE_TANK, pre_tank_temp),
+                    )),
+                    Targets(target_desk_temp, self.target_tank_temp,
+                            self.temp_threshold, self.freeze_prevention_temp),
+                    States(self.pump_state, self.heater_state, self.fan_state),
+                )
                 
                 # Log the decision factors
-                logger.info(f"Room heating need: {need_room_heat} ({room_reason})")
-                logger.info(f"Tank heating need: {need_tank_heat} ({tank_reason})")
-                logger.info(f"Can heat from tank: {can_heat_room} ({tank_capacity_reason})")
-                if pipe_freeze_risk:
-                    logger.info(f"Pipe freeze prevention: {freeze_reason}")
+                logger.info("Room heating need: %s (%s)", decision.need_room_heat, decision.room_reason)
+                logger.info("Tank heating need: %s (%s)", decision.need_tank_heat, decision.tank_reason)
+                logger.info("Can heat from tank: %s (%s)", decision.can_heat_room, decision.tank_capacity_reason)
+                if decision.pipe_freeze_risk:
+                    logger.info("Pipe freeze prevention: %s", decision.freeze_reason)
+                for msg, args in decision.messages:
+                    logger.info(msg, *args)
                 
-                # Pump control - needed for both:
-                # 1. Distributing heat from tank (if room needs heat and tank has capacity, or freeze risk)
-                # 2. Moving water through heater to heat tank (if tank needs heat)
-                should_run_pump = need_tank_heat or pipe_freeze_risk or (need_room_heat and can_heat_room)
-                if should_run_pump != self.pump_state:
-                    # Apply deadband control for pump based on room temperature
-                    if should_run_pump and desk_temp > (self.target_desk_temp - self.temp_threshold):
-                        logger.info(f"Not turning pump on: room temperature {desk_temp:.1f}F above lower threshold {self.target_desk_temp - self.temp_threshold:.1f}F")
-                    elif not should_run_pump and desk_temp < (self.target_desk_temp + self.temp_threshold):
-                        logger.info(f"Not turning pump off: room temperature {desk_temp:.1f}F below upper threshold {self.target_desk_temp + self.temp_threshold:.1f}F")
-                    else:
-                        await self.control_component('pump', should_run_pump)
+                for component, desired_state in decision.toggles.items():
+                    await self.control_component(component, desired_state, now)
                 
-                # Heater control - only for maintaining tank temperature
-                if need_tank_heat != self.heater_state:
-                    # Apply deadband control for heater based on tank temperature
-                    if need_tank_heat and tank_temp > (self.target_tank_temp - self.temp_threshold):
-                        logger.info(f"Not turning heater on: tank temperature {tank_temp:.1f}F above lower threshold {self.target_tank_temp - self.temp_threshold:.1f}F")
-                    elif not need_tank_heat and tank_temp < (self.target_tank_temp + self.temp_threshold):
-                        logger.info(f"Not turning heater off: tank temperature {tank_temp:.1f}F below upper threshold {self.target_tank_temp + self.temp_threshold:.1f}F")
-                    else:
-                        await self.control_component('heater', need_tank_heat)
-                
-                # Fan control - run when room needs heat and floor is warmer than desk
-                floor_temp = readings.get(self.LOCATION_FLOOR)
-                should_run_fan = (need_room_heat and 
-                                floor_temp is not None and 
-                                desk_temp is not None and 
-                                floor_temp > desk_temp)
-                
-                if should_run_fan != self.fan_state:
-                    # Apply deadband control for fan based on room temperature
-                    if should_run_fan and desk_temp > (self.target_desk_temp - self.temp_threshold):
-                        logger.info(f"Not turning fan on: room temperature {desk_temp:.1f}F above lower threshold {self.target_desk_temp - self.temp_threshold:.1f}F")
-                    elif not should_run_fan and desk_temp < (self.target_desk_temp + self.temp_threshold):
-                        logger.info(f"Not turning fan off: room temperature {desk_temp:.1f}F below upper threshold {self.target_desk_temp + self.temp_threshold:.1f}F")
-                    else:
-                        await self.control_component('fan', should_run_fan)
-                        if should_run_fan:
-                            logger.info(f"Turning fan on: floor temp {floor_temp:.1f}F > desk temp {desk_temp:.1f}F")
-                
-                # Force sync our internal states with reality occasionally
-                for component in ['pump', 'heater', 'fan']:
-                    device = self.devices.get(component)
-                    if device:
-                        await device.update()  # Get the true device state
-                        if device.switch_status is not None:
-                            actual_state = device.switch_status
-                            internal_state = getattr(self, f"{component}_state")
-                            if actual_state != internal_state:
-                                logger.warning(f"{component} state mismatch: internal={internal_state}, actual={actual_state}")
-                                setattr(self, f"{component}_state", actual_state)
+                # Force sync our internal states with reality: re-query the plugs
+                # toggled this cycle, and every plug on a slow cadence
+                components = [c for c in self.COMPONENTS if c in self.devices]
+                if (self._last_full_sync_ns is None or
+                        _mono() - self._last_full_sync_ns > FULL_SYNC_INTERVAL_NS):
+                    self._last_full_sync_ns = _mono()
+                    stale = components
+                else:
+                    stale = [c for c in components if c in self._toggled_this_cycle]
+                self._toggled_this_cycle.clear()
+                await asyncio.gather(
+                    *(self.devices[c].update() for c in stale),
+                    return_exceptions=True
+                )
+                for component in components:
+                    actual_state = self.devices[component].switch_status
+                    if actual_state is not None:
+                        internal_state = getattr(self, f"{component}_state")
+                        if actual_state != internal_state:
+                            logger.warning("%s state mismatch: internal=%s, actual=%s", component, internal_state, actual_state)
+                            setattr(self, f"{component}_state", actual_state)
                 
                 # Log system state and targets with unique sensor_ids and metrics
-                self.storage.store_readings([
+                for reading in [
                     Reading(
-                        timestamp=datetime.now(),
+                        timestamp=now,
                         source_type='controller',
-                        sensor_id=self.get_control_sensor_id(self.LOCATION_TANK),
+                        sensor_id=self._sensor_ids[self.LOCATION_TANK],
                         location=self.LOCATION_TANK,
-                        metric=self.get_control_metric(self.METRIC_TARGET_TEMP, 'tank'),
+                        metric=self._control_metrics[self.METRIC_TARGET_TEMP, 'tank'],
                         metric_type='numeric',
                         value=str(self.target_tank_temp)
                     ),
                     Reading(
-                        timestamp=datetime.now(),
+                        timestamp=now,
                         source_type='controller',
-                        sensor_id=self.get_control_sensor_id(self.LOCATION_TANK),
+                        sensor_id=self._sensor_ids[self.LOCATION_TANK],
                         location=self.LOCATION_TANK,
-                        metric=self.get_control_metric('critical_temp_f', 'tank'),
+                        metric=self._control_metrics['critical_temp_f', 'tank'],
                         metric_type='numeric',
                         value=str(self.critical_tank_temp)
                     )
-                ])
+                ]:
+                    self.queue_reading(reading)
+                
+                # Back off while nothing needs to change and every temperature is
+                # well clear of its deadband; otherwise poll at the base interval
+                desired_states = decision.desired_states
+                pending = [c for c, desired in desired_states.items()
+                           if c in self.devices and desired != getattr(self, f"{c}_state")]
+                margin = 2 * self.temp_threshold
+                if (not pending and not decision.pipe_freeze_risk and
+                        abs(desk_temp - target_desk_temp) > margin and
+                        abs(tank_temp - self.target_tank_temp) > margin):
+                    self._poll_interval = min(MAX_POLL_INTERVAL, self._poll_interval * POLL_BACKOFF)
+                else:
+                    self._poll_interval = POLL_INTERVAL
+                next_wait = self._poll_interval
+                
+                # Re-evaluate as soon as a cooldown blocking a wanted toggle expires
+                for component in pending:
+                    remaining = self.devices[component].cooldown_remaining(desired_states[component])
+                    if remaining > 0:
+                        next_wait = min(next_wait, remaining + 1)
+                self._next_wait = next_wait
                 
             except Exception as e:
-                logger.error(f"Error in control loop: {e}")
-            
-            await asyncio.sleep(30)  # Run control loop every 30 seconds 
\ No newline at end of file
+                logger.error("Error in control loop: %s", e)
+            finally:
+                self._reschedule.set() 
\ No newline at end of file
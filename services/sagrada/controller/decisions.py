@@ -0,0 +1,185 @@
+"""Pure heating control decisions, kept free of device and database I/O."""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+# A log message and its lazy %-style arguments
+Message = Tuple[str, tuple]
+
+
+@dataclass(frozen=True)
+class Readings:
+    """Current temperatures (F) the decisions are based on"""
+    desk_temp: float
+    tank_temp: float
+    floor_temp: Optional[float] = None
+    # (location, temperature) for each pipe location
+    pipe_temps: Tuple[Tuple[str, Optional[float]], ...] = ()
+
+
+@dataclass(frozen=True)
+class Targets:
+    """Control targets and thresholds (F)"""
+    desk_temp: float
+    tank_temp: float
+    threshold: float
+    freeze_prevention_temp: float
+    # Deadband edges around each target, derived once per cycle
+    desk_lo: float = field(init=False)
+    desk_hi: float = field(init=False)
+    tank_lo: float = field(init=False)
+    tank_hi: float = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'desk_lo', self.desk_temp - self.threshold)
+        object.__setattr__(self, 'desk_hi', self.desk_temp + self.threshold)
+        object.__setattr__(self, 'tank_lo', self.tank_temp - self.threshold)
+        object.__setattr__(self, 'tank_hi', self.tank_temp + self.threshold)
+
+
+@dataclass(frozen=True)
+class States:
+    """Current on/off state of each component"""
+    pump: bool
+    heater: bool
+    fan: bool
+
+
+@dataclass(frozen=True)
+class Decision:
+    """Outcome of one control cycle's decisions"""
+    need_room_heat: bool
+    room_reason: str
+    need_tank_heat: bool
+    tank_reason: str
+    can_heat_room: bool
+    tank_capacity_reason: str
+    pipe_freeze_risk: bool
+    freeze_reason: str
+    should_run_pump: bool
+    should_run_fan: bool
+    # Components to switch, mapped to their new state, in pump/heater/fan order
+    toggles: Dict[str, bool]
+    # Why wanted state changes were held back (or made), for logging
+    messages: Tuple[Message, ...]
+
+    @property
+    def desired_states(self) -> Dict[str, bool]:
+        """The state each component should be in, before deadband control"""
+        return {'pump': self.should_run_pump, 'heater': self.need_tank_heat, 'fan': self.should_run_fan}
+
+
+def evaluate_room_heating_need(desk_temp: float, targets: Targets) -> Tuple[bool, str]:
+    """Evaluate if the room needs heating and why"""
+    if desk_temp < targets.desk_temp:
+        return True, f"Room temperature ({desk_temp:.1f}F) below target ({targets.desk_temp:.1f}F)"
+    return False, f"Room temperature ({desk_temp:.1f}F) at or above target ({targets.desk_temp:.1f}F)"
+
+
+def evaluate_tank_heating_need(tank_temp: float, need_room_heat: bool, targets: Targets) -> Tuple[bool, str]:
+    """Evaluate if tank needs heating, with different behaviors for room heating vs freeze prevention.
+
+    When room heating is needed:
+        - Heat tank to target temperature (targets.tank_temp)
+    When room heating is not needed:
+        - Only heat if tank is below freeze prevention temperature
+    """
+    # If we need room heat, maintain the target tank temperature
+    if need_room_heat:
+        if tank_temp < targets.tank_temp:
+            return True, f"Tank temperature ({tank_temp:.1f}F) below target ({targets.tank_temp:.1f}F) and room needs heat"
+        return False, f"Tank temperature ({tank_temp:.1f}F) sufficient for room heating (>= {targets.tank_temp:.1f}F)"
+
+    # If we don't need room heat, only prevent freezing
+    if tank_temp < targets.freeze_prevention_temp:
+        return True, f"Tank temperature ({tank_temp:.1f}F) approaching freezing (< {targets.freeze_prevention_temp:.1f}F)"
+
+    return False, f"Tank temperature ({tank_temp:.1f}F) above freeze prevention threshold ({targets.freeze_prevention_temp:.1f}F), no heating needed"
+
+
+def can_heat_from_tank(tank_temp: float, targets: Targets) -> Tuple[bool, str]:
+    """Evaluate if the tank has enough stored energy to heat effectively"""
+    if tank_temp >= targets.tank_lo:
+        return True, f"Tank temperature ({tank_temp:.1f}F) sufficient for heating (>= {targets.tank_lo:.1f}F)"
+    return False, f"Tank temperature ({tank_temp:.1f}F) too low for effective heating (< {targets.tank_lo:.1f}F)"
+
+
+def check_pipe_freeze_risk(pipe_temps: Tuple[Tuple[str, Optional[float]], ...],
+                           targets: Targets) -> Tuple[bool, str]:
+    """Check pipe temperatures for freeze risk"""
+    coldest = min((temp for _, temp in pipe_temps if temp is not None), default=None)
+    if coldest is None or coldest >= targets.freeze_prevention_temp:
+        return False, "No freeze risk in pipes (all temperatures above freeze prevention threshold)"
+
+    # Only name the coldest location once we know there is a risk to report
+    location = next(loc for loc, temp in pipe_temps if temp == coldest)
+    return True, f"{location} temperature ({coldest:.1f}F) below freeze prevention threshold ({targets.freeze_prevention_temp:.1f}F)"
+
+
+def _apply_deadband(component: str, desired: bool, current: bool, label: str, temp: float,
+                    lo: float, hi: float, toggles: Dict[str, bool], messages: list):
+    """Switch a component only once temp has left the deadband [lo, hi]"""
+    if desired == current:
+        return
+    if desired and temp > lo:
+        messages.append(("Not turning %s on: %s temperature %.1fF above lower threshold %.1fF",
+                         (component, label, temp, lo)))
+    elif not desired and temp < hi:
+        messages.append(("Not turning %s off: %s temperature %.1fF below upper threshold %.1fF",
+                         (component, label, temp, hi)))
+    else:
+        toggles[component] = desired
+
+
+def decide(readings: Readings, targets: Targets, states: States) -> Decision:
+    """Decide which components to switch this cycle"""
+    desk_temp = readings.desk_temp
+    tank_temp = readings.tank_temp
+    floor_temp = readings.floor_temp
+
+    # Energy transfer path 1: Tank → Distribution
+    # Check both comfort heating and freeze prevention needs
+    need_room_heat, room_reason = evaluate_room_heating_need(desk_temp, targets)
+    can_heat_room, tank_capacity_reason = can_heat_from_tank(tank_temp, targets)
+    pipe_freeze_risk, freeze_reason = check_pipe_freeze_risk(readings.pipe_temps, targets)
+
+    # Energy transfer path 2: Heater → Tank
+    need_tank_heat, tank_reason = evaluate_tank_heating_need(tank_temp, need_room_heat, targets)
+
+    toggles: Dict[str, bool] = {}
+    messages: list = []
+
+    # Pump control - needed for both:
+    # 1. Distributing heat from tank (if room needs heat and tank has capacity, or freeze risk)
+    # 2. Moving water through heater to heat tank (if tank needs heat)
+    # Deadband is based on room temperature
+    should_run_pump = need_tank_heat or pipe_freeze_risk or (need_room_heat and can_heat_room)
+    _apply_deadband('pump', should_run_pump, states.pump, 'room', desk_temp,
+                    targets.desk_lo, targets.desk_hi, toggles, messages)
+
+    # Heater control - only for maintaining tank temperature, deadband on tank temperature
+    _apply_deadband('heater', need_tank_heat, states.heater, 'tank', tank_temp,
+                    targets.tank_lo, targets.tank_hi, toggles, messages)
+
+    # Fan control - run when room needs heat and floor is warmer than desk,
+    # deadband on room temperature
+    should_run_fan = need_room_heat and floor_temp is not None and floor_temp > desk_temp
+    _apply_deadband('fan', should_run_fan, states.fan, 'room', desk_temp,
+                    targets.desk_lo, targets.desk_hi, toggles, messages)
+    if toggles.get('fan'):
+        messages.append(("Turning fan on: floor temp %.1fF > desk temp %.1fF", (floor_temp, desk_temp)))
+
+    return Decision(
+        need_room_heat=need_room_heat,
+        room_reason=room_reason,
+        need_tank_heat=need_tank_heat,
+        tank_reason=tank_reason,
+        can_heat_room=can_heat_room,
+        tank_capacity_reason=tank_capacity_reason,
+        pipe_freeze_risk=pipe_freeze_risk,
+        freeze_reason=freeze_reason,
+        should_run_pump=should_run_pump,
+        should_run_fan=should_run_fan,
+        toggles=toggles,
+        messages=tuple(messages),
+    )
@@ -4,9 +4,11 @@ Handles data retrieval with graceful error handling and caching.
 """
 
 import logging
+import os
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, replace
 
 from sagrada.shared.database import DBConfig, ReadingsStorage
 from sagrada.shared.models import Reading
@@ -46,13 +48,36 @@ class DataFetcher:
     """Fetches and caches system data with graceful error handling"""
     
     # System locations we want to monitor (format: {system}/{location})
-    TEMPERATURE_LOCATIONS = [
+    TEMPERATURE_LOCATIONS = (
         'heating/tank', 'ambient/desk', 'heating/floor', 'heating/heater-input',
         'heating/heater-output', 'heating/pre-tank', 'outside/main',
         'ambient/workbench', 'ambient/door', 'shed'
-    ]
+    )
     
-    COMPONENT_LOCATIONS = ['heater', 'pump', 'fan']
+    COMPONENT_LOCATIONS = ('heater', 'pump', 'fan')
+    COMPONENT_METRICS = ('control_state_heater', 'control_state_pump', 'control_state_fan')
+    # Component for each control state metric (e.g., 'control_state_pump' -> 'pump')
+    _METRIC_TO_COMPONENT = dict(zip(COMPONENT_METRICS, COMPONENT_LOCATIONS))
+    
+    TARGET_LOCATION = 'shed'
+    TARGET_METRIC = 'target_temp_f'
+    
+    # Everything a refresh needs, fetched in one query: (locations, metrics) pairs
+    STATUS_QUERY_SPECS = (
+        (TEMPERATURE_LOCATIONS, ('temperature_f',)),
+        (COMPONENT_LOCATIONS, COMPONENT_METRICS),
+        ((TARGET_LOCATION,), (TARGET_METRIC,)),
+    )
+    
+    # Rate of change is measured against the oldest reading in this window
+    RATE_WINDOW_MINUTES = 15
+    RATE_WINDOW = timedelta(minutes=RATE_WINDOW_MINUTES)
+    # Upper bound on history rows fetched per refresh, across all sensors
+    HISTORY_LIMIT = 20000
+    
+    # Back-to-back get_system_status calls within this many seconds reuse the
+    # last status; override with DISPLAY_STATUS_TTL (0 disables)
+    DEFAULT_STATUS_TTL = 1.0
     
     # Temperature thresholds for alerts
     FREEZE_WARNING_TEMP = 40.0
@@ -63,42 +88,74 @@ class DataFetcher:
         self.storage = ReadingsStorage(db_config)
         self.last_successful_fetch = None
         self.cached_status = None
+        self._ttl_seconds = float(os.getenv("DISPLAY_STATUS_TTL", self.DEFAULT_STATUS_TTL))
+        # Sliding window of (timestamp, temperature) by location, oldest first; seeded
+        # from the database on the first fetch, then extended with each new reading
+        self._temp_history: Dict[str, Deque[Tuple[datetime, float]]] = {}
+        self._temp_history_seeded = False
         
     def get_system_status(self) -> SystemStatus:
         """Get current system status with error handling"""
+        # One clock reading for the whole refresh, so all ages are measured from the same instant
+        now = datetime.now()
+        
+        if (self.cached_status and
+                (now - self.last_successful_fetch).total_seconds() < self._ttl_seconds):
+            return self.cached_status
+        
         try:
-            return self._fetch_current_status()
+            return self._fetch_current_status(now)
         except Exception as e:
             logger.error(f"Failed to fetch system status: {e}")
-            return self._get_fallback_status(str(e))
+            return self._get_fallback_status(str(e), now)
     
-    def _fetch_current_status(self) -> SystemStatus:
+    def _fetch_current_status(self, now: datetime) -> SystemStatus:
         """Fetch current status from database"""
-        # Test database connection
+        # All reads for one refresh share a transaction, so they see one consistent
+        # snapshot and the next refresh starts a fresh one; a connection failure raises here
         try:
-            self.storage._get_connection().close()
-            db_connected = True
+            with self.storage.transaction():
+                # All current readings in a single round trip
+                readings = self.storage.get_current_readings_multi(self.STATUS_QUERY_SPECS)
+                
+                # Rate-of-change history only needs the database on cold start
+                if not self._temp_history_seeded:
+                    self._temp_history = {
+                        location: deque(history)
+                        for location, history in self._fetch_all_histories(now).items()
+                    }
+                    self._temp_history_seeded = True
         except Exception:
-            db_connected = False
+            # get_system_status reports this through the disconnected fallback status
             raise Exception("Database connection failed")
         
         # Fetch temperature readings
-        sensors = self._fetch_sensor_status()
+        sensors = self._fetch_sensor_status([
+            r for (location, metric), r in readings.items() if metric == 'temperature_f'
+        ], now)
         
         # Fetch component states
-        components = self._fetch_component_status()
+        components = self._fetch_component_status([
+            r for (location, metric), r in readings.items() if metric in self._METRIC_TO_COMPONENT
+        ], now)
         
         # Get target temperature
-        target_temp = self._fetch_target_temperature()
+        target_temp = self._fetch_target_temperature(
+            readings.get((self.TARGET_LOCATION, self.TARGET_METRIC))
+        )
         
         # Determine control mode and reasoning
-        control_mode, control_reason = self._determine_control_logic(sensors, target_temp)
+        # Classify sensors once for both the control logic and the alerts
+        offline_sensors, freeze_sensors = self._classify_sensors(sensors)
+        
+        control_mode, control_reason = self._determine_control_logic(sensors, target_temp, freeze_sensors)
         
         # Generate alerts
-        alerts = self._generate_alerts(sensors, components)
+        alerts = self._generate_alerts(sensors, offline_sensors, freeze_sensors)
         
         status = SystemStatus(
-            database_connected=db_connected,
+            # Reaching here means the bulk query above succeeded
+            database_connected=True,
             sensors=sensors,
             components=components,
             target_temp=target_temp,
@@ -108,106 +165,119 @@ class DataFetcher:
         )
         
         # Cache successful fetch
-        self.last_successful_fetch = datetime.now()
+        self.last_successful_fetch = now
         self.cached_status = status
         
         return status
     
-    def _calculate_temperature_rate_of_change(self, location: str, current_value: float, current_time: datetime) -> Optional[float]:
-        """Calculate rate of change for temperature in °F/hour"""
+    def _fetch_all_histories(self, now: datetime) -> Dict[str, List[Tuple[datetime, float]]]:
+        """Fetch recent temperature history for every sensor, oldest first per location"""
+        histories: Dict[str, List[Tuple[datetime, float]]] = {}
         try:
-            # Get historical data for the last 15 minutes
+            # One query for all locations instead of one per sensor
             historical_readings = self.storage.get_historical_readings(
-                locations=[location],
-                metrics=['temperature_f'],
-                minutes_back=15
+                start_time=now - self.RATE_WINDOW,
+                locations=self.TEMPERATURE_LOCATIONS,
+                metrics=('temperature_f',),
+                limit=self.HISTORY_LIMIT
             )
-            
-            if len(historical_readings) < 2:
-                return None
-                
-            # Filter to valid numeric readings and sort by timestamp
-            valid_readings = []
-            for reading in historical_readings:
-                if (reading.value and reading.value.lower() != 'null' and 
-                    reading.timestamp and reading.timestamp != current_time):
-                    try:
-                        temp_value = float(reading.value)
-                        valid_readings.append((reading.timestamp, temp_value))
-                    except (ValueError, TypeError):
-                        continue
-            
-            if len(valid_readings) < 1:
-                return None
-                
-            # Sort by timestamp (oldest first for calculation)
-            valid_readings.sort(key=lambda x: x[0])
-            
-            # Use the oldest available reading for rate calculation
-            oldest_time, oldest_temp = valid_readings[0]
-            
-            # Calculate time difference in hours
-            time_diff = (current_time - oldest_time).total_seconds() / 3600.0
-            
-            if time_diff <= 0:
-                return None
-                
-            # Calculate rate of change in °F/hour
-            temp_diff = current_value - oldest_temp
-            rate_of_change = temp_diff / time_diff
-            
-            return rate_of_change
-            
         except Exception as e:
-            logger.error(f"Failed to calculate rate of change for {location}: {e}")
+            logger.error(f"Failed to fetch temperature history: {e}")
+            return histories
+        
+        # Readings come back newest first; walk them in reverse so each list is oldest first
+        for reading in reversed(historical_readings):
+            if reading.value and reading.value.lower() != 'null' and reading.timestamp:
+                try:
+                    histories.setdefault(reading.location, []).append(
+                        (reading.timestamp, float(reading.value))
+                    )
+                except (ValueError, TypeError):
+                    continue
+        
+        return histories
+    
+    def _update_temperature_history(self, location: str, timestamp: datetime, value: float,
+                                    now: datetime) -> Deque[Tuple[datetime, float]]:
+        """Add a reading to a location's sliding window and drop readings older than the window"""
+        history = self._temp_history.setdefault(location, deque())
+        if not history or timestamp > history[-1][0]:
+            history.append((timestamp, value))
+        
+        cutoff = now - self.RATE_WINDOW
+        while history and history[0][0] < cutoff:
+            history.popleft()
+        
+        return history
+    
+    def _calculate_temperature_rate_of_change(self, history: Sequence[Tuple[datetime, float]],
+                                              current_value: float,
+                                              current_time: datetime) -> Optional[float]:
+        """Calculate rate of change for temperature in °F/hour from oldest-first history"""
+        if not history:
             return None
+        
+        # Use the oldest available reading for rate calculation
+        oldest_time, oldest_temp = history[0]
+        
+        # Calculate time difference in hours
+        time_diff = (current_time - oldest_time).total_seconds() / 3600.0
+        
+        if time_diff <= 0:
+            return None
+            
+        # Calculate rate of change in °F/hour
+        temp_diff = current_value - oldest_temp
+        return temp_diff / time_diff
     
-    def _fetch_sensor_status(self) -> Dict[str, SensorStatus]:
-        """Fetch current temperature sensor readings"""
+    def _fetch_sensor_status(self, readings: List[Reading], now: datetime) -> Dict[str, SensorStatus]:
+        """Build temperature sensor status from pre-fetched current readings"""
         sensors = {}
         
         try:
-            # Get recent readings for all temperature locations
-            readings = self.storage.get_current_readings(
-                locations=self.TEMPERATURE_LOCATIONS,
-                metrics=['temperature_f']
-            )
-            
-            # Convert to sensor status objects
-            readings_by_location = {r.location: r for r in readings}
-            
-            for location in self.TEMPERATURE_LOCATIONS:
-                reading = readings_by_location.get(location)
+            # Convert to sensor status objects in a single pass over the readings
+            for reading in readings:
+                location = reading.location
+                if not reading.value or reading.value.lower() == 'null':
+                    continue  # Reported as "No data" below
+                
+                try:
+                    temp_value = float(reading.value)
+                except ValueError:
+                    sensors[location] = self._create_offline_sensor(location, "Invalid data")
+                    continue
                 
-                if reading and reading.value and reading.value.lower() != 'null':
-                    try:
-                        temp_value = float(reading.value)
-                        is_online = self._is_reading_recent(reading.timestamp)
-                        
-                        # Calculate rate of change
-                        rate_of_change = None
-                        if is_online and reading.timestamp:
-                            rate_of_change = self._calculate_temperature_rate_of_change(
-                                location, temp_value, reading.timestamp
-                            )
-                        
-                        if is_online:
-                            status_text = f"{temp_value:.1f}°F"
-                        else:
-                            age_text = self._format_time_ago(reading.timestamp)
-                            status_text = f"STALE ({age_text})"
-                        
-                        sensors[location] = SensorStatus(
-                            location=location,
-                            value=temp_value,
-                            last_update=reading.timestamp,
-                            is_online=is_online,
-                            status_text=status_text,
-                            rate_of_change=rate_of_change
+                is_online = self._is_reading_recent(reading.timestamp, now)
+                
+                # Calculate rate of change
+                rate_of_change = None
+                if reading.timestamp:
+                    history = self._update_temperature_history(
+                        location, reading.timestamp, temp_value, now
+                    )
+                    if is_online:
+                        rate_of_change = self._calculate_temperature_rate_of_change(
+                            history, temp_value, reading.timestamp
                         )
-                    except (ValueError, TypeError):
-                        sensors[location] = self._create_offline_sensor(location, "Invalid data")
+                
+                if is_online:
+                    status_text = f"{temp_value:.1f}°F"
                 else:
+                    age_text = self._format_time_ago(reading.timestamp, now)
+                    status_text = f"STALE ({age_text})"
+                
+                sensors[location] = SensorStatus(
+                    location=location,
+                    value=temp_value,
+                    last_update=reading.timestamp,
+                    is_online=is_online,
+                    status_text=status_text,
+                    rate_of_change=rate_of_change
+                )
+            
+            # Fill in every monitored location that had no usable reading
+            for location in self.TEMPERATURE_LOCATIONS:
+                if location not in sensors:
                     sensors[location] = self._create_offline_sensor(location, "No data")
                     
         except Exception as e:
@@ -218,25 +288,17 @@ class DataFetcher:
         
         return sensors
     
-    def _fetch_component_status(self) -> Dict[str, ComponentState]:
-        """Fetch heating component states"""
+    def _fetch_component_status(self, readings: List[Reading], now: datetime) -> Dict[str, ComponentState]:
+        """Build heating component states from pre-fetched current readings"""
         components = {}
         
         try:
-            # Get recent component state readings
-            readings = self.storage.get_current_readings(
-                locations=self.COMPONENT_LOCATIONS,
-                metrics=['control_state_heater', 'control_state_pump', 'control_state_fan']
-            )
-            
             # Group readings by component
             component_readings = {}
             for reading in readings:
-                # Extract component name from metric (e.g., 'control_state_pump' -> 'pump')
-                if 'control_state_' in reading.metric:
-                    component = reading.metric.replace('control_state_', '')
-                    if component in self.COMPONENT_LOCATIONS:
-                        component_readings[component] = reading
+                component = self._METRIC_TO_COMPONENT.get(reading.metric)
+                if component is not None:
+                    component_readings[component] = reading
             
             # Create component status objects
             for component in self.COMPONENT_LOCATIONS:
@@ -244,7 +306,7 @@ class DataFetcher:
                 
                 if reading:
                     is_on = reading.value and reading.value.lower() == 'on'
-                    age_text = self._format_time_ago(reading.timestamp)
+                    age_text = self._format_time_ago(reading.timestamp, now)
                     status_text = f"{'ON' if is_on else 'OFF'} ({age_text})"
                     
                     components[component] = ComponentState(
@@ -273,22 +335,29 @@ class DataFetcher:
         
         return components
     
-    def _fetch_target_temperature(self) -> Optional[float]:
-        """Fetch target temperature from thermostat"""
+    def _fetch_target_temperature(self, reading: Optional[Reading]) -> Optional[float]:
+        """Get target temperature from the pre-fetched thermostat reading"""
         try:
-            readings = self.storage.get_current_readings(
-                locations=['shed'],
-                metrics=['target_temp_f']
-            )
-            
-            if readings and readings[0].value and readings[0].value.lower() != 'null':
-                return float(readings[0].value)
+            if reading and reading.value and reading.value.lower() != 'null':
+                return float(reading.value)
         except Exception as e:
             logger.error(f"Failed to fetch target temperature: {e}")
         
         return None
     
-    def _determine_control_logic(self, sensors: Dict[str, SensorStatus], target_temp: Optional[float]) -> Tuple[str, str]:
+    def _classify_sensors(self, sensors: Dict[str, SensorStatus]) -> Tuple[List[str], List[str]]:
+        """Find offline sensors and online sensors below the freeze warning, in one pass"""
+        offline_sensors = []
+        freeze_sensors = []
+        for name, sensor in sensors.items():
+            if not sensor.is_online:
+                offline_sensors.append(name)
+            elif sensor.value and sensor.value < self.FREEZE_WARNING_TEMP:
+                freeze_sensors.append(name)
+        return offline_sensors, freeze_sensors
+    
+    def _determine_control_logic(self, sensors: Dict[str, SensorStatus], target_temp: Optional[float],
+                                 freeze_sensors: List[str]) -> Tuple[str, str]:
         """Determine current control mode and reasoning"""
         desk_sensor = sensors.get('desk')
         tank_sensor = sensors.get('tank')
@@ -311,25 +380,21 @@ class DataFetcher:
                 return "Comfort Heat", f"Room {desk_temp:.1f}°F below target {target_temp:.1f}°F"
             else:
                 return "Tank Heating", f"Tank {tank_temp:.1f}°F too low for heating"
-        elif any(s.value and s.value < self.FREEZE_WARNING_TEMP for s in sensors.values() if s.is_online):
+        elif freeze_sensors:
             return "Freeze Prevention", "Temperatures approaching freeze threshold"
         else:
             return "Maintaining", f"Room {desk_temp:.1f}°F at target {target_temp:.1f}°F"
     
-    def _generate_alerts(self, sensors: Dict[str, SensorStatus], components: Dict[str, ComponentState]) -> List[str]:
+    def _generate_alerts(self, sensors: Dict[str, SensorStatus], offline_sensors: List[str],
+                         freeze_sensors: List[str]) -> List[str]:
         """Generate system alerts"""
         alerts = []
         
         # Check for offline sensors
-        offline_sensors = [name for name, sensor in sensors.items() if not sensor.is_online]
         if offline_sensors:
             alerts.append(f"⚠ Offline sensors: {', '.join(offline_sensors)}")
         
         # Check for freeze warnings
-        freeze_sensors = [
-            name for name, sensor in sensors.items() 
-            if sensor.is_online and sensor.value and sensor.value < self.FREEZE_WARNING_TEMP
-        ]
         if freeze_sensors:
             alerts.append(f"🥶 Freeze risk: {', '.join(freeze_sensors)}")
         
@@ -354,37 +419,38 @@ class DataFetcher:
             rate_of_change=None
         )
     
-    def _is_reading_recent(self, timestamp: datetime, max_age_minutes: int = 5) -> bool:
+    def _is_reading_recent(self, timestamp: datetime, now: datetime, max_age_minutes: int = 5) -> bool:
         """Check if a reading is recent enough to be considered current"""
         if not timestamp:
             return False
-        age = datetime.now() - timestamp
+        age = now - timestamp
         return age.total_seconds() < (max_age_minutes * 60)
     
-    def _format_time_ago(self, timestamp: Optional[datetime]) -> str:
+    def _format_time_ago(self, timestamp: Optional[datetime], now: datetime) -> str:
         """Format time ago string"""
         if not timestamp:
             return "unknown"
         
-        age = datetime.now() - timestamp
-        if age.total_seconds() < 60:
-            return f"{int(age.total_seconds())}s ago"
-        elif age.total_seconds() < 3600:
-            return f"{int(age.total_seconds() / 60)}m ago"
+        age_seconds = (now - timestamp).total_seconds()
+        if age_seconds < 60:
+            return f"{int(age_seconds)}s ago"
+        elif age_seconds < 3600:
+            return f"{int(age_seconds / 60)}m ago"
         else:
-            return f"{int(age.total_seconds() / 3600)}h ago"
+            return f"{int(age_seconds / 3600)}h ago"
     
-    def _get_fallback_status(self, error_msg: str) -> SystemStatus:
+    def _get_fallback_status(self, error_msg: str, now: datetime) -> SystemStatus:
         """Return fallback status when data fetch fails"""
         # Use cached status if available and recent
         if (self.cached_status and self.last_successful_fetch and 
-            datetime.now() - self.last_successful_fetch < timedelta(minutes=5)):
+            now - self.last_successful_fetch < timedelta(minutes=5)):
             
-            # Update the status to show it's cached
-            cached_status = self.cached_status
-            cached_status.database_connected = False
-            cached_status.alerts = [f"⚠ Database error: {error_msg}"] + cached_status.alerts
-            return cached_status
+            # Return a copy marked as cached, leaving the last good status untouched
+            return replace(
+                self.cached_status,
+                database_connected=False,
+                alerts=[f"⚠ Database error: {error_msg}"] + self.cached_status.alerts
+            )
         
         # Return minimal error status
         return SystemStatus(
@@ -5,6 +5,9 @@ Designed for direct output to /dev/tty1.
 """
 
 import logging
+import os
+import textwrap
+import time
 from datetime import datetime
 from typing import Optional
 
@@ -18,12 +21,41 @@ from rich.align import Align
 
 from .data_fetcher import DataFetcher, SystemStatus
 from sagrada.collector.config.settings import Config
+from sagrada.shared.database import get_readings_sentinel_path
 
 logger = logging.getLogger(__name__)
 
+# Priority order for display (format: {system}/{location})
+PRIORITY_LOCATIONS = (
+    'heating/tank', 'ambient/desk', 'heating/floor', 'outside/main',
+    'ambient/workbench', 'heating/heater-input', 'heating/heater-output',
+    'heating/pre-tank', 'ambient/door'
+)
+LOCATION_LABELS = {location: location.replace('-', ' ').title() for location in PRIORITY_LOCATIONS}
+
+# Temperature style by bucket: (value >= 40) + (value > 80)
+TEMP_STYLES = ("red", "green", "yellow")  # Freeze warning, normal, hot
+# Locations whose own low threshold takes precedence over the buckets
+TEMP_LOW_OVERRIDES = {'heating/tank': (120, "yellow")}
+
+# Rate style by bucket: (rate >= -2) + (rate > 0) + (rate > 2)
+RATE_STYLES = (
+    "cyan",    # Rapidly cooling
+    "green",   # Stable or slowly cooling
+    "yellow",  # Slowly warming
+    "red",     # Rapidly warming
+)
+
 class TerminalMonitor:
     """Terminal-based display monitor using Rich"""
     
+    # Refetch at least this often even if no new readings were stored, so
+    # sensors still age into STALE/OFFLINE
+    SNAPSHOT_TTL = 60.0
+    # Without a local readings sentinel there is no change signal, so refetch
+    # on every display refresh
+    SNAPSHOT_TTL_NO_SENTINEL = 5.0
+    
     def __init__(self, config: Config):
         self.config = config
         self.data_fetcher = DataFetcher(config.db_config)
@@ -38,28 +70,61 @@ class TerminalMonitor:
             logger.warning(f"Could not open /dev/tty1, falling back to stdout: {e}")
             self.console = Console(force_terminal=True)
         
-        self.live_display = None
+        # Layout sections are only rebuilt when the inputs they render change;
+        # Live repaints in place instead of clearing the whole screen each tick
+        self._layout = self._create_layout()
+        self._panel_keys = {}
+        self._showing_error = False
+        self.live_display = Live(self._layout, console=self.console, screen=True, auto_refresh=False)
+        self.live_display.start()
+        
+        # Last fetched status, when it expires, and the sentinel mtime it saw
+        self._snapshot_cache: Optional[SystemStatus] = None
+        self._snapshot_expiry = 0.0
+        self._snapshot_sentinel: Optional[int] = None
+        self._sentinel_path = get_readings_sentinel_path()
+        
+    def _get_status(self) -> SystemStatus:
+        """Get system status, refetching only when readings changed or the snapshot expired"""
+        try:
+            sentinel = os.stat(self._sentinel_path).st_mtime_ns
+            ttl = self.SNAPSHOT_TTL
+        except OSError:
+            sentinel = None
+            ttl = self.SNAPSHOT_TTL_NO_SENTINEL
+        
+        now = time.monotonic()
+        if (self._snapshot_cache is None or now >= self._snapshot_expiry or
+                sentinel != self._snapshot_sentinel):
+            status = self.data_fetcher.get_system_status()
+            self._snapshot_cache = status
+            self._snapshot_sentinel = sentinel
+            # Don't hold on to an error status; retry on the next refresh
+            self._snapshot_expiry = now + ttl if status.database_connected else now
+        
+        return self._snapshot_cache
         
     def update_display(self):
         """Update the display with current system status"""
         try:
-            # Fetch current system status
-            status = self.data_fetcher.get_system_status()
+            # Fetch current system status (cached until readings change)
+            status = self._get_status()
             
-            # Create the full display layout
-            layout = self._create_layout(status)
+            # Rebuild changed sections, with every age measured from one instant
+            self._update_layout(status, datetime.now())
             
-            # Clear screen and display
-            self.console.clear()
-            self.console.print(layout)
+            if self._showing_error:
+                self.live_display.update(self._layout)
+                self._showing_error = False
+            self.live_display.refresh()
             
         except Exception as e:
             logger.error(f"Display update failed: {e}")
             # Show error message on display
             self._show_error_display(str(e))
     
-    def _create_layout(self, status: SystemStatus) -> Layout:
-        """Create the main display layout"""
+    def _create_layout(self) -> Layout:
+        """Create the main display layout, with sections filled in by _update_layout"""
         # Create main layout
         layout = Layout()
         
@@ -87,18 +152,48 @@ class TerminalMonitor:
             Layout(name="alerts")
         )
         
-        # Populate each section
-        layout["header"].update(self._create_header(status))
-        layout["temperatures"].update(self._create_temperature_panel(status))
-        layout["control"].update(self._create_control_panel(status))
-        layout["system"].update(self._create_system_panel(status))
-        layout["alerts"].update(self._create_alerts_panel(status))
-        
         return layout
     
-    def _create_header(self, status: SystemStatus) -> Panel:
+    def _update_layout(self, status: SystemStatus, now: datetime):
+        """Rebuild only the layout sections whose displayed inputs changed"""
+        # (section, key of everything the panel shows, panel factory)
+        sections = (
+            ("header", (now.strftime("%Y-%m-%d %H:%M:%S"), status.database_connected),
+             lambda: self._create_header(status, now)),
+            ("temperatures", tuple((location, sensor.value, sensor.is_online, sensor.rate_of_change)
+                                   for location, sensor in status.sensors.items()),
+             lambda: self._create_temperature_panel(status)),
+            ("control", (status.control_mode, status.control_reason),
+             lambda: self._create_control_panel(status)),
+            ("system", (tuple((name, component.is_on, self._format_age(component.last_toggle, now))
+                              for name, component in status.components.items()),
+                        status.target_temp),
+             lambda: self._create_system_panel(status, now)),
+            ("alerts", tuple(status.alerts),
+             lambda: self._create_alerts_panel(status)),
+        )
+        
+        for name, key, create_panel in sections:
+            if self._panel_keys.get(name) != key:
+                self._layout[name].update(create_panel())
+                self._panel_keys[name] = key
+    
+    def _format_age(self, timestamp: Optional[datetime], now: datetime) -> str:
+        """Format the age of a timestamp as a short string like '5m'"""
+        if not timestamp:
+            return "Unknown"
+        
+        age_seconds = (now - timestamp).total_seconds()
+        if age_seconds < 60:
+            return f"{int(age_seconds)}s"
+        elif age_seconds < 3600:
+            return f"{int(age_seconds / 60)}m"
+        else:
+            return f"{int(age_seconds / 3600)}h"
+    
+    def _create_header(self, status: SystemStatus, now: datetime) -> Panel:
         """Create header with title and timestamp"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
         
         # Connection status indicator
         db_indicator = "🟢 ONLINE" if status.database_connected else "🔴 OFFLINE"
@@ -120,65 +215,44 @@ class TerminalMonitor:
         table.add_column("Temperature", style="white", width=12)
         table.add_column("Rate", style="white", width=8)
         
-        # Priority order for display (format: {system}/{location})
-        priority_locations = [
-            'heating/tank', 'ambient/desk', 'heating/floor', 'outside/main',
-            'ambient/workbench', 'heating/heater-input', 'heating/heater-output',
-            'heating/pre-tank', 'ambient/door'
-        ]
-
-        for location in priority_locations:
+        for location in PRIORITY_LOCATIONS:
             sensor = status.sensors.get(location)
             if sensor:
+                value = sensor.value
+                
                 # Color coding based on status and values
-                if not sensor.is_online:
+                if not sensor.is_online or value is None:
                     temp_style = "red"
-                    status_style = "red"
-                elif sensor.value is not None:
-                    if location == 'heating/tank' and sensor.value < 120:
-                        temp_style = "yellow"
-                    elif sensor.value < 40:  # Freeze warning
-                        temp_style = "red"
-                    elif sensor.value > 80:  # Hot
-                        temp_style = "yellow" 
-                    else:
-                        temp_style = "green"
-                    status_style = "green"
                 else:
-                    temp_style = "red"
-                    status_style = "red"
+                    override = TEMP_LOW_OVERRIDES.get(location)
+                    if override and value < override[0]:
+                        temp_style = override[1]
+                    else:
+                        temp_style = TEMP_STYLES[(value >= 40) + (value > 80)]
                 
                 # Format location name with status indicator
-                location_display = location.replace('-', ' ').title()
                 status_indicator = "●" if sensor.is_online else "○"
-                location_with_status = f"{status_indicator} {location_display}"
+                location_with_status = f"{status_indicator} {LOCATION_LABELS[location]}"
                 
-                # Format rate of change
-                if sensor.rate_of_change is not None:
-                    rate_text = f"{sensor.rate_of_change:+.1f}/h"
-                    # Color code the rate based on direction
-                    if sensor.rate_of_change > 2:
-                        rate_style = "red"  # Rapidly warming
-                    elif sensor.rate_of_change < -2:
-                        rate_style = "cyan"  # Rapidly cooling
-                    elif sensor.rate_of_change > 0:
-                        rate_style = "yellow"  # Slowly warming
-                    else:
-                        rate_style = "green"  # Stable or slowly cooling
+                # Format rate of change, color coded by direction
+                rate = sensor.rate_of_change
+                if rate is not None:
+                    rate_text = f"{rate:+.1f}/h"
+                    rate_style = RATE_STYLES[(rate >= -2) + (rate > 0) + (rate > 2)]
                 else:
                     rate_text = "---"
                     rate_style = temp_style
                 
                 table.add_row(
                     location_with_status,
-                    f"{sensor.value:.1f}°F" if sensor.value is not None else "---",
+                    f"{value:.1f}°F" if value is not None else "---",
                     rate_text,
                     style=temp_style
                 )
         
         return Panel(table, title="TEMPERATURES", style="cyan")
     
-    def _create_system_panel(self, status: SystemStatus) -> Panel:
+    def _create_system_panel(self, status: SystemStatus, now: datetime) -> Panel:
         """Create system status panel"""
         table = Table(show_header=True, header_style="bold cyan", box=None)
         table.add_column("Component", style="white", width=10)
@@ -192,16 +266,7 @@ class TerminalMonitor:
                 status_style = "green" if component.is_on else "red"
                 
                 # Format last change time
-                if component.last_toggle:
-                    age = datetime.now() - component.last_toggle
-                    if age.total_seconds() < 60:
-                        age_text = f"{int(age.total_seconds())}s"
-                    elif age.total_seconds() < 3600:
-                        age_text = f"{int(age.total_seconds() / 60)}m"
-                    else:
-                        age_text = f"{int(age.total_seconds() / 3600)}h"
-                else:
-                    age_text = "Unknown"
+                age_text = self._format_age(component.last_toggle, now)
                 
                 table.add_row(
                     component_name.title(),
@@ -228,22 +293,10 @@ class TerminalMonitor:
         # Control reasoning
         content.append(Text("Current Logic:", style="bold white"))
         
-        # Split long reasoning text into lines
-        reason_lines = status.control_reason.split('\n')
-        for line in reason_lines:
-            if len(line) > 50:  # Wrap long lines
-                words = line.split()
-                current_line = ""
-                for word in words:
-                    if len(current_line) + len(word) + 1 <= 50:
-                        current_line += (" " if current_line else "") + word
-                    else:
-                        content.append(Text(f"  {current_line}", style="white"))
-                        current_line = word
-                if current_line:
-                    content.append(Text(f"  {current_line}", style="white"))
-            else:
-                content.append(Text(f"  {line}", style="white"))
+        # Split long reasoning text into lines, wrapping at 50 characters
+        for line in status.control_reason.split('\n'):
+            for wrapped in textwrap.wrap(line, 50) or [line]:
+                content.append(Text(f"  {wrapped}", style="white"))
         
         # Create a text object with all content
         panel_content = Text()
@@ -284,8 +337,6 @@ class TerminalMonitor:
     def _show_error_display(self, error_msg: str):
         """Show error display when system fails"""
         try:
-            self.console.clear()
-            
             error_panel = Panel(
                 Align.center(Text(f"DISPLAY ERROR\n\n{error_msg}", style="bold red")),
                 title="System Error",
@@ -304,7 +355,10 @@ class TerminalMonitor:
                 Layout(error_panel)
             )
             
-            self.console.print(layout)
+            self.live_display.update(layout, refresh=True)
+            self._showing_error = True
+            # The error screen replaced every section; rebuild them all on recovery
+            self._panel_keys.clear()
             
         except Exception as e:
             # Ultimate fallback
@@ -317,6 +371,7 @@ class TerminalMonitor:
     def cleanup(self):
         """Cleanup resources"""
         try:
+            self.live_display.stop()
             if hasattr(self.console, 'file') and hasattr(self.console.file, 'close'):
                 if self.console.file.name == '/dev/tty1':
                     self.console.file.close()
@@ -6,9 +6,9 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Optional
 
-import yaml
 from dotenv import load_dotenv
 
+from sagrada.shared.config import load_yaml_file
 from sagrada.shared.database import DBConfig
 from sagrada.shared.mqtt import MQTTConfig
 
@@ -58,8 +58,7 @@ def load_config(config_path: Optional[str] = None) -> Config:
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
 
     # Load YAML config
-    with open(config_path) as f:
-        config_data = yaml.safe_load(f)
+    config_data = load_yaml_file(config_path)
 
     # Build MQTT config
     mqtt_data = config_data.get("mqtt", {})
@@ -1,22 +1,99 @@
 """MQTT Logger Service - subscribes to topics and logs readings to MySQL."""
 
-import json
 import logging
 import signal
 import sys
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Optional
+from typing import Deque, Dict, Optional, Sequence, Tuple
 
+import orjson
 import paho.mqtt.client as mqtt
 from paho.mqtt.enums import CallbackAPIVersion
 
-from .config import Config
+from .config import Config, Subscription
 from sagrada.shared.models import Reading
 from sagrada.shared.database import ReadingsStorage
 from sagrada.shared.disk_check import check_disk_space
 
 logger = logging.getLogger(__name__)
 
+# Readings are written in batches of up to this many...
+STORE_BATCH_SIZE = 100
+# ...or after this many seconds, whichever comes first
+STORE_FLUSH_INTERVAL = 1.0
+# Readings held for retry while the database is failing; beyond this the oldest are dropped
+MAX_PENDING_READINGS = 10000
+
+# Signal names by number, built once so the handler needs no enum lookup
+SIGNAL_NAMES = {int(s): s.name for s in signal.Signals}
+
+# Key under which a trie node stores the subscription whose pattern ends there
+SUBSCRIPTION_KEY = ""
+
+
+def parse_topic(topic: str) -> Optional[Tuple[str, str, str, str]]:
+    """Split a {building}/{system}/{location}/{metric} topic into its segments.
+
+    Args:
+        topic: The MQTT topic.
+
+    Returns:
+        The four segments, or None unless the topic has exactly three separators.
+    """
+    i = topic.find("/")
+    j = topic.find("/", i + 1) if i >= 0 else -1
+    k = topic.find("/", j + 1) if j >= 0 else -1
+    if k < 0 or topic.find("/", k + 1) >= 0:
+        return None
+    return topic[:i], topic[i + 1:j], topic[j + 1:k], topic[k + 1:]
+
+
+def build_subscription_trie(subscriptions: Sequence[Subscription]) -> Dict:
+    """Compile subscription patterns into a trie keyed by topic segment.
+
+    Args:
+        subscriptions: Configured subscriptions; "+" and "#" are MQTT wildcards.
+
+    Returns:
+        Nested dicts of segment -> child node, with matched subscriptions
+        stored under SUBSCRIPTION_KEY. Earlier subscriptions win on duplicates.
+    """
+    trie: Dict = {}
+    for sub in subscriptions:
+        node = trie
+        for segment in sub.pattern.split("/"):
+            node = node.setdefault(segment, {})
+        node.setdefault(SUBSCRIPTION_KEY, sub)
+    return trie
+
+
+def match_subscription(node: Dict, segments: Sequence[str], depth: int = 0) -> Optional[Subscription]:
+    """Find the subscription matching topic segments, preferring literal segments over wildcards.
+
+    Args:
+        node: Trie node from build_subscription_trie.
+        segments: Topic split on "/".
+        depth: Index of the segment to match at this node.
+
+    Returns:
+        The matching subscription, or None.
+    """
+    if depth == len(segments):
+        return node.get(SUBSCRIPTION_KEY) or node.get("#", {}).get(SUBSCRIPTION_KEY)
+
+    segment = segments[depth]
+    for key in (segment, "+"):
+        child = node.get(key)
+        if child is not None:
+            sub = match_subscription(child, segments, depth + 1)
+            if sub is not None:
+                return sub
+
+    multi = node.get("#")
+    return multi.get(SUBSCRIPTION_KEY) if multi is not None else None
+
 
 class MQTTLoggerService:
     """Service that subscribes to MQTT topics and logs readings to the database."""
@@ -26,6 +103,11 @@ class MQTTLoggerService:
         self.storage = ReadingsStorage(config.db)
         self.client: Optional[mqtt.Client] = None
         self._running = False
+        # Subscription patterns compiled once, for O(depth) topic dispatch
+        self._subscriptions = build_subscription_trie(config.subscriptions)
+        # Readings parsed on the MQTT network thread, waiting to be written by run()
+        self._pending: Deque[Reading] = deque()
+        self._batch_ready = threading.Event()
 
     def _on_connect(self, client: mqtt.Client, userdata, flags, reason_code, properties):
         """Callback when connected to MQTT broker."""
@@ -61,20 +143,25 @@ class MQTTLoggerService:
         """
         # Parse topic segments
         # Expected format: {building}/{system}/{location}/{metric}
-        segments = topic.split("/")
-        if len(segments) != 4:
-            logger.debug(f"Ignoring topic with unexpected format: {topic}")
+        segments = parse_topic(topic)
+        if segments is None:
+            logger.debug("Ignoring topic with unexpected format: %s", topic)
             return
 
         building, system, location_key, metric_type = segments
 
+        subscription = match_subscription(self._subscriptions, segments)
+        if subscription is None:
+            logger.debug("Ignoring topic with no matching subscription: %s", topic)
+            return
+
         # Construct location from system/location_key
         location = f"{system}/{location_key}"
 
-        # Parse JSON payload
+        # Parse JSON payload; orjson reads the bytes directly and rejects invalid UTF-8 itself
         try:
-            data = json.loads(payload.decode("utf-8"))
-        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            data = orjson.loads(payload)
+        except orjson.JSONDecodeError as e:
             logger.warning(f"Failed to parse payload from {topic}: {e}")
             return
 
@@ -96,7 +183,7 @@ class MQTTLoggerService:
             return
 
         # Determine metric name (e.g., "temperature_c" for Celsius temperatures)
-        if metric_type == "temperature":
+        if subscription.type == "temperature":
             metric = f"temperature_{unit.lower()}" if unit else "temperature"
         else:
             metric = metric_type
@@ -112,23 +199,56 @@ class MQTTLoggerService:
             value=str(value),
         )
 
-        # Check disk space before storing
-        if not check_disk_space():
-            logger.warning("Disk full - skipping message persistence")
-            return
+        # Queue for the next batch write
+        self._pending.append(reading)
+        # Lazy %-style args: this runs per message and DEBUG is normally off
+        logger.debug("Queued: %s/%s = %s from %s", location, metric, value, sensor_id)
+        if len(self._pending) >= STORE_BATCH_SIZE:
+            self._batch_ready.set()
 
-        # Store to database
-        if self.storage.store_reading(reading):
-            logger.debug(f"Logged: {location}/{metric} = {value} from {sensor_id}")
-        else:
-            logger.warning(f"Failed to store reading from {topic}")
+    def _flush_pending(self):
+        """Write queued readings to the database in batches.
+
+        A batch that fails to store goes back to the front of the queue to be
+        retried on the next flush, up to MAX_PENDING_READINGS queued in total.
+        """
+        while self._pending:
+            # Only this thread removes readings, so the length can only grow meanwhile
+            batch = [self._pending.popleft() for _ in range(min(STORE_BATCH_SIZE, len(self._pending)))]
+
+            # Check disk space before storing
+            if not check_disk_space():
+                logger.warning(f"Disk full - skipping persistence of {len(batch)} readings")
+                continue
+
+            if self.storage.store_readings(batch):
+                logger.debug("Logged %d readings", len(batch))
+            else:
+                self._pending.extendleft(reversed(batch))
+                excess = len(self._pending) - MAX_PENDING_READINGS
+                for _ in range(max(excess, 0)):
+                    self._pending.popleft()
+                if excess > 0:
+                    logger.warning(f"Failed to store {len(batch)} readings, dropped {excess} oldest")
+                else:
+                    logger.warning(f"Failed to store {len(batch)} readings, will retry")
+                # Leave the rest for the next tick rather than hammering a failing database
+                return
+
+    def _store_loop(self):
+        """Flush queued readings whenever a batch fills up or the flush interval passes."""
+        while self._running:
+            self._batch_ready.wait(STORE_FLUSH_INTERVAL)
+            self._batch_ready.clear()
+            self._flush_pending()
 
     def _setup_signal_handlers(self):
         """Set up signal handlers for graceful shutdown."""
         def signal_handler(signum, frame):
-            signame = signal.Signals(signum).name
+            signame = SIGNAL_NAMES.get(signum, str(signum))
             logger.info(f"Received {signame}, shutting down...")
             self._running = False
+            self._batch_ready.set()
             if self.client:
                 self.client.disconnect()
 
@@ -153,11 +273,15 @@ class MQTTLoggerService:
 
         try:
             self.client.connect(self.config.mqtt.broker, self.config.mqtt.port, keepalive=60)
-            self.client.loop_forever()
+            # Network traffic runs on paho's thread; this thread does the database writes
+            self.client.loop_start()
+            self._store_loop()
         except KeyboardInterrupt:
             logger.info("Interrupted by user")
         except Exception as e:
             logger.error(f"MQTT error: {e}")
         finally:
+            self.client.loop_stop()
+            self._flush_pending()
             self.storage.close()
             logger.info("MQTT Logger service stopped")
@@ -4,8 +4,7 @@ import os
 from dataclasses import dataclass, field
 from typing import Optional
 
-import yaml
-
+from sagrada.shared.config import load_yaml_file
 from sagrada.shared.mqtt import MQTTConfig
 
 
@@ -77,9 +76,8 @@ def load_config(config_path: Optional[str] = None) -> NetworkMonitorConfig:
         config_path = os.environ.get("NETWORK_MONITOR_CONFIG")
 
     if config_path and os.path.exists(config_path):
-        with open(config_path) as f:
-            data = yaml.safe_load(f)
-            return NetworkMonitorConfig.from_dict(data or {})
+        data = load_yaml_file(config_path)
+        return NetworkMonitorConfig.from_dict(data or {})
 
     # Environment variable overrides
     config = NetworkMonitorConfig()
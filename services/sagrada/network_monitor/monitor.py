@@ -1,8 +1,9 @@
 """Network Monitor Service - Monitors network connectivity and attempts recovery."""
 
 import asyncio
-import json
 import logging
+import socket
+import struct
 import subprocess
 import time
 from dataclasses import dataclass, field
@@ -10,6 +11,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional, List, Dict, Any
 
+import orjson
 import paho.mqtt.client as mqtt
 from paho.mqtt.enums import CallbackAPIVersion
 
@@ -17,6 +19,12 @@ from .config import NetworkMonitorConfig
 
 logger = logging.getLogger(__name__)
 
+# ICMP echo header: type, code, checksum, identifier, sequence
+ICMP_HEADER = struct.Struct("!BBHHH")
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMP_PAYLOAD = b"sagrada-network-monitor"
+
 
 class NetworkState(Enum):
     """Network connectivity states."""
@@ -35,6 +43,17 @@ class RecoveryLevel(Enum):
     REBOOT = 4  # Last resort, disabled by default
 
 
+# Numeric state published for logging to MySQL: 0=healthy, 1=degraded, 2=down
+STATE_VALUES = {NetworkState.HEALTHY: 0, NetworkState.DEGRADED: 1, NetworkState.DOWN: 2}
+
+# Metrics published individually under the status topic
+METRICS = ("state", "gateway_latency", "internet_latency", "failures")
+
+# QoS 1 messages awaiting PUBACK at once, and messages held while disconnected
+MQTT_MAX_INFLIGHT = 100
+MQTT_MAX_QUEUED = 1000
+
+
 @dataclass
 class ConnectivityCheck:
     """Result of a connectivity check."""
@@ -87,16 +106,36 @@ class NetworkMonitorService:
         self.last_state = NetworkState.HEALTHY
         self.state_changed_at = time.time()
 
+        # Unprivileged ICMP sockets need net.ipv4.ping_group_range to include
+        # our group; without them, fall back to the ping binary
+        self._icmp_available = True
+        self._icmp_sequence = 0
+        # ping command lines by (host, timeout), built on first use of the fallback
+        self._ping_argv: Dict[tuple, List[str]] = {}
+
+        # Per-metric topics, built once rather than on every publish
+        self._metric_topics = {metric: f"{config.mqtt_topic}/{metric}" for metric in METRICS}
+
     def _setup_mqtt(self) -> None:
         """Set up MQTT client for publishing status."""
         self.mqtt_client = mqtt.Client(
             callback_api_version=CallbackAPIVersion.VERSION2,
             client_id=f"network-monitor-{int(time.time())}",
         )
+        # Let QoS 1 publishes overlap their PUBACKs, and bound what piles up
+        # while the broker is unreachable (e.g. during the outage being reported)
+        self.mqtt_client.max_inflight_messages_set(MQTT_MAX_INFLIGHT)
+        self.mqtt_client.max_queued_messages_set(MQTT_MAX_QUEUED)
 
         def on_connect(client, userdata, flags, reason_code, properties):
             if reason_code == 0:
                 logger.info("Connected to MQTT broker")
+                # Send small publish frames immediately rather than holding them for Nagle
+                sock = client.socket()
+                try:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                except (AttributeError, OSError) as e:
+                    logger.debug("Could not set TCP_NODELAY on MQTT socket: %s", e)
             else:
                 logger.error(f"MQTT connection failed: {reason_code}")
 
@@ -119,14 +158,76 @@ class NetworkMonitorService:
 
     def _ping(self, host: str, timeout: float = 2.0) -> ConnectivityCheck:
         """Ping a host and return connectivity check result."""
+        if self._icmp_available:
+            try:
+                return self._icmp_ping(host, timeout)
+            except OSError as e:
+                # EACCES without ping_group_range, EPROTONOSUPPORT etc. on stripped kernels
+                logger.info(f"ICMP sockets unavailable ({e}), falling back to the ping command")
+                self._icmp_available = False
+        return self._subprocess_ping(host, timeout)
+
+    def _icmp_ping(self, host: str, timeout: float) -> ConnectivityCheck:
+        """Send one ICMP echo request from an unprivileged datagram socket.
+
+        Raises OSError (e.g. PermissionError) if this process can't open an ICMP
+        socket; failures after that are reported in the result instead.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        with sock:
+            # The kernel fills in the identifier and checksum for ICMP datagram sockets
+            self._icmp_sequence = (self._icmp_sequence + 1) & 0xFFFF
+            sequence = self._icmp_sequence
+            packet = ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, 0, sequence) + ICMP_PAYLOAD
+
+            try:
+                start = time.monotonic()
+                deadline = start + timeout
+                sock.sendto(packet, (host, 0))
+
+                # Skip replies to earlier, timed-out requests
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise socket.timeout()
+                    sock.settimeout(remaining)
+                    reply = sock.recv(1024)
+                    reply_type, _, _, _, reply_sequence = ICMP_HEADER.unpack_from(reply)
+                    if reply_type == ICMP_ECHO_REPLY and reply_sequence == sequence:
+                        break
+            except socket.timeout:
+                return ConnectivityCheck(
+                    target=host,
+                    success=False,
+                    error="timeout",
+                )
+            except OSError as e:
+                return ConnectivityCheck(
+                    target=host,
+                    success=False,
+                    error=str(e),
+                )
+
+            return ConnectivityCheck(
+                target=host,
+                success=True,
+                latency_ms=(time.monotonic() - start) * 1000,
+            )
+
+    def _subprocess_ping(self, host: str, timeout: float) -> ConnectivityCheck:
+        """Ping a host with the ping command and return connectivity check result."""
+        argv = self._ping_argv.get((host, timeout))
+        if argv is None:
+            argv = self._ping_argv[(host, timeout)] = ["ping", "-c", "1", "-W", str(int(timeout)), host]
+
         try:
-            start = time.time()
+            start = time.monotonic()
             result = subprocess.run(
-                ["ping", "-c", "1", "-W", str(int(timeout)), host],
+                argv,
                 capture_output=True,
                 timeout=timeout + 1,
             )
-            latency = (time.time() - start) * 1000
+            latency = (time.monotonic() - start) * 1000
 
             if result.returncode == 0:
                 return ConnectivityCheck(
@@ -156,14 +257,9 @@ class NetworkMonitorService:
     def _check_wifi_link(self) -> bool:
         """Check if WiFi interface has a link."""
         try:
-            result = subprocess.run(
-                ["cat", f"/sys/class/net/{self.config.wifi_interface}/operstate"],
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            return result.stdout.strip() == "up"
-        except Exception as e:
+            with open(f"/sys/class/net/{self.config.wifi_interface}/operstate") as f:
+                return f.read().strip() == "up"
+        except OSError as e:
             logger.warning(f"Could not check WiFi link: {e}")
             return False
 
@@ -180,22 +276,26 @@ class NetworkMonitorService:
         except Exception:
             return None
 
-    def check_connectivity(self) -> NetworkStatus:
-        """Run all connectivity checks and return status."""
-        checks = []
-
-        # Check gateway
-        gateway_check = self._ping(self.config.gateway_ip, self.config.ping_timeout)
-        checks.append(gateway_check)
+    async def check_connectivity(self) -> NetworkStatus:
+        """Run all connectivity checks concurrently and return status."""
+        # The checks are independent blocking calls; run them side by side so a
+        # check takes as long as the slowest ping rather than the sum of them
+        gateway_task = asyncio.to_thread(self._ping, self.config.gateway_ip, self.config.ping_timeout)
+        wifi_task = asyncio.to_thread(self._check_wifi_link)
 
-        # Check internet (optional)
+        # Check gateway, internet (optional) and WiFi link
         internet_check = None
         if self.config.check_internet:
-            internet_check = self._ping(self.config.internet_ip, self.config.ping_timeout)
-            checks.append(internet_check)
-
-        # Check WiFi link
-        wifi_connected = self._check_wifi_link()
+            internet_task = asyncio.to_thread(
+                self._ping, self.config.internet_ip, self.config.ping_timeout
+            )
+            gateway_check, internet_check, wifi_connected = await asyncio.gather(
+                gateway_task, internet_task, wifi_task
+            )
+            checks = [gateway_check, internet_check]
+        else:
+            gateway_check, wifi_connected = await asyncio.gather(gateway_task, wifi_task)
+            checks = [gateway_check]
 
         # Determine overall state
         gateway_ok = gateway_check.success
@@ -228,6 +328,25 @@ class NetworkMonitorService:
             checks=checks,
         )
 
+    async def _run_command(self, argv: List[str], timeout: float) -> int:
+        """Run a recovery command with its output discarded and return its exit code.
+
+        Raises asyncio.TimeoutError (after killing the command) if it runs past timeout.
+        """
+        # Spawned without pipes and awaited without blocking the event loop
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            return await asyncio.wait_for(process.wait(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+
     async def _run_recovery_action(self, level: RecoveryLevel) -> bool:
         """Execute a recovery action at the specified level."""
         logger.info(f"Attempting recovery action: {level.name}")
@@ -237,23 +356,17 @@ class NetworkMonitorService:
         try:
             if level == RecoveryLevel.ARP_FLUSH:
                 # Flush ARP cache
-                result = subprocess.run(
-                    ["sudo", "ip", "neigh", "flush", "all"],
-                    capture_output=True,
-                    timeout=10,
-                )
-                success = result.returncode == 0
+                returncode = await self._run_command(["sudo", "ip", "neigh", "flush", "all"], 10)
+                success = returncode == 0
                 logger.info(f"ARP flush {'succeeded' if success else 'failed'}")
                 return success
 
             elif level == RecoveryLevel.WIFI_REASSOCIATE:
                 # Reassociate WiFi
-                result = subprocess.run(
-                    ["sudo", "wpa_cli", "-i", self.config.wifi_interface, "reassociate"],
-                    capture_output=True,
-                    timeout=15,
+                returncode = await self._run_command(
+                    ["sudo", "wpa_cli", "-i", self.config.wifi_interface, "reassociate"], 15
                 )
-                success = result.returncode == 0
+                success = returncode == 0
                 logger.info(f"WiFi reassociate {'succeeded' if success else 'failed'}")
                 # Wait for connection to establish
                 if success:
@@ -264,18 +377,14 @@ class NetworkMonitorService:
                 # Full network restart
                 logger.warning("Restarting network service...")
                 # Try NetworkManager first, fall back to dhcpcd
-                result = subprocess.run(
-                    ["sudo", "systemctl", "restart", "NetworkManager"],
-                    capture_output=True,
-                    timeout=30,
+                returncode = await self._run_command(
+                    ["sudo", "systemctl", "restart", "NetworkManager"], 30
                 )
-                if result.returncode != 0:
-                    result = subprocess.run(
-                        ["sudo", "systemctl", "restart", "dhcpcd"],
-                        capture_output=True,
-                        timeout=30,
+                if returncode != 0:
+                    returncode = await self._run_command(
+                        ["sudo", "systemctl", "restart", "dhcpcd"], 30
                     )
-                success = result.returncode == 0
+                success = returncode == 0
                 logger.info(f"Network restart {'succeeded' if success else 'failed'}")
                 if success:
                     await asyncio.sleep(10)
@@ -286,10 +395,10 @@ class NetworkMonitorService:
                     logger.warning("Reboot requested but disabled in config")
                     return False
                 logger.critical("Initiating system reboot...")
-                subprocess.run(["sudo", "reboot"], timeout=5)
+                await self._run_command(["sudo", "reboot"], 5)
                 return True
 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             logger.error(f"Recovery action {level.name} timed out")
             return False
         except Exception as e:
@@ -333,19 +442,20 @@ class NetworkMonitorService:
 
         await self._run_recovery_action(level)
 
-    def _publish_metric(self, metric: str, value: any, unit: str = None) -> None:
+    def _publish_metric(self, metric: str, value: any, unit: str = None,
+                        ts: Optional[float] = None, qos: int = 1) -> None:
         """Publish a single metric to MQTT in sensor format."""
         if not self.mqtt_client:
             return
 
-        topic = f"{self.config.mqtt_topic}/{metric}"
-        payload = json.dumps({
+        topic = self._metric_topics[metric]
+        payload = orjson.dumps({
             "value": value,
             "unit": unit,
-            "ts": time.time(),
+            "ts": time.time() if ts is None else ts,
             "sensor": "network-monitor",
         })
-        self.mqtt_client.publish(topic, payload, qos=1)
+        self.mqtt_client.publish(topic, payload, qos=qos)
 
     def publish_status(self, status: NetworkStatus) -> None:
         """Publish network status to MQTT."""
@@ -354,7 +464,7 @@ class NetworkMonitorService:
 
         try:
             # Publish combined status (for dashboard)
-            payload = json.dumps(status.to_dict())
+            payload = orjson.dumps(status.to_dict())
             self.mqtt_client.publish(
                 self.config.mqtt_topic,
                 payload,
@@ -363,25 +473,27 @@ class NetworkMonitorService:
 
             # Publish individual metrics (for logging to MySQL)
             # State as numeric: 0=healthy, 1=degraded, 2=down
-            state_value = {"healthy": 0, "degraded": 1, "down": 2}.get(status.state.value, -1)
-            self._publish_metric("state", state_value, "state")
+            state_value = STATE_VALUES.get(status.state, -1)
+            ts = time.time()
+            self._publish_metric("state", state_value, "state", ts)
 
             # Gateway latency (from first check)
             if status.checks:
                 gateway_check = status.checks[0]
                 if gateway_check.success and gateway_check.latency_ms is not None:
-                    self._publish_metric("gateway_latency", round(gateway_check.latency_ms, 1), "ms")
+                    # Latency samples are superseded every interval; skip the PUBACK round trip
+                    self._publish_metric("gateway_latency", round(gateway_check.latency_ms, 1), "ms", ts, qos=0)
 
                 # Internet latency (from second check if present)
                 if len(status.checks) > 1:
                     internet_check = status.checks[1]
                     if internet_check.success and internet_check.latency_ms is not None:
-                        self._publish_metric("internet_latency", round(internet_check.latency_ms, 1), "ms")
+                        self._publish_metric("internet_latency", round(internet_check.latency_ms, 1), "ms", ts, qos=0)
 
             # Failure count
-            self._publish_metric("failures", status.consecutive_failures, "count")
+            self._publish_metric("failures", status.consecutive_failures, "count", ts)
 
-            logger.debug(f"Published status: {status.state.value}")
+            logger.debug("Published status: %s", status.state.value)
         except Exception as e:
             logger.error(f"Failed to publish status: {e}")
 
@@ -392,10 +504,15 @@ class NetworkMonitorService:
             f"interval={self.config.check_interval}s)"
         )
 
+        # Checks run on a fixed cadence: each sleep is shortened by however long
+        # the check, publish and any recovery took
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+
         while self.running:
             try:
                 # Check connectivity
-                status = self.check_connectivity()
+                status = await self.check_connectivity()
 
                 # Log status changes or periodic status
                 if status.state != NetworkState.HEALTHY:
@@ -414,7 +531,13 @@ class NetworkMonitorService:
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
 
-            await asyncio.sleep(self.config.check_interval)
+            next_tick += self.config.check_interval
+            now = loop.time()
+            if next_tick < now:
+                # Fell more than an interval behind (e.g. a network restart); skip
+                # the missed ticks rather than running them back to back
+                next_tick = now
+            await asyncio.sleep(next_tick - now)
 
     def run(self) -> None:
         """Start the monitoring service."""
@@ -4,6 +4,7 @@ from .models import Reading
 from .database import DBConfig, ReadingsStorage
 from .config import load_yaml_config, get_config_path
 from .mqtt import MQTTConfig
+from .mqtt_publisher import MQTTPublisher
 from .logging import setup_logging
 from .disk_check import DiskFullError, check_disk_space, require_disk_space, get_disk_usage
 
@@ -14,6 +15,7 @@ __all__ = [
     "load_yaml_config",
     "get_config_path",
     "MQTTConfig",
+    "MQTTPublisher",
     "setup_logging",
     "DiskFullError",
     "check_disk_space",
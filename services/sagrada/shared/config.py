@@ -1,12 +1,32 @@
 """Configuration loading utilities."""
 
+import copy
+import json
+import logging
 import os
+import stat
+import tempfile
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Optional, Tuple, Union
 
 import yaml
 from dotenv import load_dotenv
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
+logger = logging.getLogger(__name__)
+
+# Parsed YAML files keyed by absolute path, validated against (mtime, size)
+_YAML_CACHE: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+_YAML_CACHE_MAX = 100
+
+# repo_root/config/; this assumes we're installed in repo_root/services/
+_DEFAULT_CONFIG_DIR = Path(__file__).parent.parent.parent.parent / "config"
+
 
 def get_environment() -> str:
     """Get the current environment name.
@@ -33,12 +53,9 @@ def get_config_path(
         Path to the configuration file.
     """
     if config_dir is None:
-        # Default to repo_root/config/
-        # This assumes we're installed in repo_root/services/
-        package_dir = Path(__file__).parent.parent.parent.parent
-        config_dir = package_dir / "config"
-
-    config_dir = Path(config_dir)
+        config_dir = _DEFAULT_CONFIG_DIR
+    else:
+        config_dir = Path(config_dir)
 
     if config_name is None:
         env = get_environment()
@@ -47,6 +64,80 @@ def get_config_path(
     return config_dir / config_name
 
 
+def _load_with_json_sidecar(path: str, st: os.stat_result) -> Any:
+    """Parse a YAML file via its ``.json`` sidecar when the sidecar is current.
+
+    The sidecar records the YAML's mtime and size and is only used while both
+    still match, so any edit (even one that keeps an older mtime) invalidates
+    it. It is rewritten atomically with the YAML's permissions. Failing to
+    write it (e.g. a read-only config directory) is not an error.
+    """
+    sidecar = path + ".json"
+    try:
+        with open(sidecar, "r") as f:
+            cached = json.load(f)
+        if cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return cached["data"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    with open(path, "r") as f:
+        data = yaml.load(f, Loader=_YamlLoader)
+
+    tmp_path = None
+    try:
+        encoded = json.dumps({"mtime_ns": st.st_mtime_ns, "size": st.st_size, "data": data})
+        # Non-string keys, dates etc. don't survive JSON; keep using the YAML then
+        if json.loads(encoded)["data"] != data:
+            raise ValueError("document does not round-trip through JSON")
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".sidecar-")
+        with os.fdopen(fd, "w") as f:
+            f.write(encoded)
+        os.chmod(tmp_path, stat.S_IMODE(st.st_mode))
+        # Readers see either the old sidecar or the complete new one
+        os.replace(tmp_path, sidecar)
+    except (OSError, TypeError, ValueError) as e:
+        logger.debug(f"Not writing config sidecar {sidecar}: {e}")
+        for stale in (tmp_path, sidecar):
+            if stale is None:
+                continue
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return data
+
+
+def load_yaml_file(path: Union[str, Path]) -> Any:
+    """Parse a YAML file, reusing the previous result if the file is unchanged.
+
+    Args:
+        path: Path to the YAML file.
+
+    Returns:
+        The parsed document. Callers get their own deep copy and may mutate it.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist.
+        yaml.YAMLError: If the file is invalid YAML.
+    """
+    key = os.path.abspath(path)
+    st = os.stat(key)
+
+    cached = _YAML_CACHE.get(key)
+    if cached is not None and cached[0] == st.st_mtime and cached[1] == st.st_size:
+        _YAML_CACHE.move_to_end(key)
+        return copy.deepcopy(cached[2])
+
+    data = _load_with_json_sidecar(key, st)
+
+    _YAML_CACHE[key] = (st.st_mtime, st.st_size, data)
+    _YAML_CACHE.move_to_end(key)
+    if len(_YAML_CACHE) > _YAML_CACHE_MAX:
+        _YAML_CACHE.popitem(last=False)
+    return copy.deepcopy(data)
+
+
 def load_yaml_config(
     config_path: Optional[Union[str, Path]] = None,
     load_env: bool = True,
@@ -76,8 +167,7 @@ def load_yaml_config(
     if not config_path.exists():
         raise FileNotFoundError(f"Config file not found: {config_path}")
 
-    with open(config_path, "r") as f:
-        return yaml.safe_load(f) or {}
+    return load_yaml_file(config_path) or {}
 
 
 def get_log_level(config: dict) -> str:
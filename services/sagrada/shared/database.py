@@ -1,19 +1,87 @@
 """Database configuration and storage utilities."""
 
+import contextlib
+import functools
 import logging
 import os
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import pymysql
-from pymysql.cursors import DictCursor
+from pymysql.cursors import Cursor, DictCursor, SSCursor
 
 from .models import Reading
 from .disk_check import require_disk_space, DiskFullError
 
 logger = logging.getLogger(__name__)
 
+# Reading queries select these columns in Reading's field order and fetch
+# plain tuples, so rows map straight onto Reading(*row):
+# timestamp, source_type, sensor_id, location, metric, metric_type, value
+
+# Touched after every successful write, so readers on the same host can tell
+# with a single stat() whether anything new has been stored. It lives in a
+# runtime directory the services own, never a world-writable one like /tmp
+READINGS_SENTINEL_NAME = "sagrada.readings.mtime"
+DEFAULT_RUNTIME_DIR = "/run/sagrada"
+
+# Seconds between liveness pings on the cached connection, so one dropped
+# while idle (e.g. past the server's wait_timeout) is reopened before use
+CONNECTION_CHECK_INTERVAL = 30.0
+
+# Socket timeouts (seconds), so an unresponsive server fails a call
+# instead of hanging the service
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+WRITE_TIMEOUT = 30
+
+
+def get_readings_sentinel_path() -> str:
+    """Get the readings sentinel path.
+
+    The directory is SAGRADA_RUNTIME_DIR if set, else XDG_RUNTIME_DIR, else
+    /run/sagrada (created by the systemd units' RuntimeDirectory=).
+
+    Returns:
+        Sentinel file path.
+    """
+    runtime_dir = (
+        os.getenv("SAGRADA_RUNTIME_DIR") or os.getenv("XDG_RUNTIME_DIR") or DEFAULT_RUNTIME_DIR
+    )
+    return os.path.join(runtime_dir, READINGS_SENTINEL_NAME)
+
+
+@functools.lru_cache(maxsize=None)
+def _warn_sentinel_unwritable(path: str, error: str):
+    """Log, once per path, that the readings sentinel can't be written."""
+    logger.warning(f"Cannot write readings sentinel {path}: {error}")
+
+
+def touch_readings_sentinel(path: Optional[str] = None):
+    """Bump the readings sentinel's mtime, creating it if needed.
+
+    Args:
+        path: Sentinel file path; defaults to get_readings_sentinel_path().
+    """
+    if path is None:
+        path = get_readings_sentinel_path()
+    try:
+        os.utime(path, follow_symlinks=False)
+    except FileNotFoundError:
+        try:
+            # Never follow a symlink planted in place of the sentinel
+            os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_NOFOLLOW, 0o644))
+        except PermissionError as e:
+            _warn_sentinel_unwritable(path, str(e))
+        except OSError as e:
+            logger.debug(f"Could not create readings sentinel {path}: {e}")
+    except PermissionError as e:
+        _warn_sentinel_unwritable(path, str(e))
+    except OSError as e:
+        logger.debug(f"Could not touch readings sentinel {path}: {e}")
+
 
 @dataclass
 class DBConfig:
@@ -34,6 +102,171 @@ class DBConfig:
         )
 
 
+@functools.lru_cache(maxsize=64)
+def _current_readings_multi_sql(
+    shape: Tuple[Tuple[int, int], ...], exclude_null: bool
+) -> str:
+    """Build the get_current_readings_multi query for a given placeholder shape.
+
+    Callers poll with the same location/metric sets every cycle, so the SQL
+    text only depends on how many placeholders each set needs and can be
+    built once and reused.
+
+    Args:
+        shape: (location count, metric count) for each spec.
+        exclude_null: Whether to skip NULL and 'null' values.
+
+    Returns:
+        The SELECT statement with %s placeholders.
+    """
+    spec_conditions = []
+    for location_count, metric_count in shape:
+        location_placeholders = ", ".join(["%s"] * location_count)
+        metric_placeholders = ", ".join(["%s"] * metric_count)
+        spec_conditions.append(
+            f"(location IN ({location_placeholders}) AND metric IN ({metric_placeholders}))"
+        )
+
+    where_clause = "(" + " OR ".join(spec_conditions) + ")"
+    if exclude_null:
+        where_clause += " AND value IS NOT NULL AND LOWER(value) <> 'null'"
+
+    return f"""
+        SELECT timestamp, source_type, sensor_id, location, metric, metric_type, value
+        FROM current_readings
+        WHERE {where_clause}
+        ORDER BY location, metric
+    """
+
+
+def _in_or_equals(column: str, count: int) -> str:
+    """Condition matching column against count placeholders."""
+    if count == 1:
+        return f"{column} = %s"
+    return f"{column} IN ({', '.join(['%s'] * count)})"
+
+
+@functools.lru_cache(maxsize=64)
+def _current_readings_sql(
+    has_source_type: bool,
+    location_count: int,
+    metric_count: int,
+    has_max_age: bool,
+    exclude_null: bool,
+    has_limit: bool = False,
+) -> str:
+    """Build the get_current_readings query for a given set of filters.
+
+    Args:
+        has_source_type: Whether to filter on source_type.
+        location_count: Number of locations to match, 0 for any.
+        metric_count: Number of metrics to match, 0 for any.
+        has_max_age: Whether to filter on a minimum timestamp.
+        exclude_null: Whether to skip NULL and 'null' values.
+        has_limit: Whether to end with a LIMIT placeholder.
+
+    Returns:
+        The SELECT statement with %s placeholders, in that filter order.
+    """
+    conditions = []
+    if has_source_type:
+        conditions.append("source_type = %s")
+    if location_count:
+        conditions.append(_in_or_equals("location", location_count))
+    if metric_count:
+        conditions.append(_in_or_equals("metric", metric_count))
+    if has_max_age:
+        conditions.append("timestamp >= %s")
+    if exclude_null:
+        conditions.append("value IS NOT NULL AND LOWER(value) <> 'null'")
+
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    limit_clause = "LIMIT %s" if has_limit else ""
+
+    return f"""
+        SELECT timestamp, source_type, sensor_id, location, metric, metric_type, value
+        FROM current_readings
+        WHERE {where_clause}
+        ORDER BY location, metric
+        {limit_clause}
+    """
+
+
+@functools.lru_cache(maxsize=64)
+def _historical_readings_sql(
+    has_location: bool,
+    has_metric: bool,
+    location_count: int,
+    metric_count: int,
+) -> str:
+    """Build the get_historical_readings query for a given set of filters.
+
+    Args:
+        has_location: Whether to filter on a single location.
+        has_metric: Whether to filter on a single metric.
+        location_count: Number of locations in the IN filter, 0 for none.
+        metric_count: Number of metrics in the IN filter, 0 for none.
+
+    Returns:
+        The SELECT statement with %s placeholders: start and end time, the
+        filters in argument order, then the row limit.
+    """
+    conditions = ["timestamp BETWEEN %s AND %s"]
+    if has_location:
+        conditions.append("location = %s")
+    if has_metric:
+        conditions.append("metric = %s")
+    if location_count:
+        conditions.append(f"location IN ({', '.join(['%s'] * location_count)})")
+    if metric_count:
+        conditions.append(f"metric IN ({', '.join(['%s'] * metric_count)})")
+
+    where_clause = " AND ".join(conditions)
+
+    return f"""
+        SELECT timestamp, source_type, sensor_id, location, metric, metric_type, value
+        FROM sensor_readings
+        WHERE {where_clause}
+        ORDER BY timestamp DESC
+        LIMIT %s
+    """
+
+
+def _historical_query(
+    start_time: datetime,
+    end_time: Optional[datetime],
+    location: Optional[str],
+    metric: Optional[str],
+    limit: int,
+    locations: Optional[List[str]],
+    metrics: Optional[List[str]],
+) -> Tuple[str, List]:
+    """Build the historical readings query and its parameters.
+
+    Returns:
+        The SELECT statement and its parameter list.
+    """
+    params: List = [start_time, end_time or datetime.now()]
+
+    if location:
+        params.append(location)
+    if metric:
+        params.append(metric)
+    if locations:
+        params.extend(locations)
+    if metrics:
+        params.extend(metrics)
+    params.append(limit)
+
+    query = _historical_readings_sql(
+        bool(location),
+        bool(metric),
+        len(locations) if locations else 0,
+        len(metrics) if metrics else 0,
+    )
+    return query, params
+
+
 class ReadingsStorage:
     """Manages storage and retrieval of sensor readings in MySQL.
 
@@ -48,9 +281,12 @@ class ReadingsStorage:
         """
         self.db_config = db_config
         self._connection: Optional[pymysql.Connection] = None
+        # Monotonic time the connection was last opened or pinged
+        self._checked_at = 0.0
 
     def _get_connection(self) -> pymysql.Connection:
-        """Get or create database connection."""
+        """Get or create database connection, reconnecting if it has dropped."""
+        now = time.monotonic()
         if self._connection is None or not self._connection.open:
             self._connection = pymysql.connect(
                 host=self.db_config.host,
@@ -58,9 +294,35 @@ class ReadingsStorage:
                 password=self.db_config.password,
                 database=self.db_config.database,
                 cursorclass=DictCursor,
+                connect_timeout=CONNECT_TIMEOUT,
+                read_timeout=READ_TIMEOUT,
+                write_timeout=WRITE_TIMEOUT,
             )
+            self._checked_at = now
+        elif now - self._checked_at >= CONNECTION_CHECK_INTERVAL:
+            self._connection.ping(reconnect=True)
+            self._checked_at = now
         return self._connection
 
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[pymysql.Connection]:
+        """Run several queries as one transaction on the shared connection.
+
+        The connection is opened on entry, so a database that is down raises
+        here. Reads inside the block see one consistent snapshot; committing
+        on exit ends it, so later reads see newly stored rows.
+
+        Yields:
+            The open database connection.
+        """
+        conn = self._get_connection()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
     def store_reading(self, reading: Reading) -> bool:
         """Store a single reading.
 
@@ -100,7 +362,9 @@ class ReadingsStorage:
                     (timestamp, source_type, sensor_id, location, metric, metric_type, value)
                     VALUES (%s, %s, %s, %s, %s, %s, %s)
                 """
-                values = [
+                # executemany consumes the rows as it encodes them, so a
+                # generator avoids holding a second copy of the batch as tuples
+                values = (
                     (
                         r.timestamp,
                         r.source_type,
@@ -111,23 +375,35 @@ class ReadingsStorage:
                         r.value,
                     )
                     for r in readings
-                ]
+                )
                 cursor.executemany(insert_sql, values)
 
-                # Update current_readings for each unique sensor/metric
+                # Update current_readings for each unique sensor/metric. Every
+                # VALUES entry is a placeholder so executemany can send all rows
+                # as one multi-row statement instead of one round trip per row.
+                # Within a batch only the newest reading per key survives the
+                # upsert, so send just that one.
+                latest: Dict[Tuple[str, str, str], Reading] = {}
+                for r in readings:
+                    key = (r.sensor_id, r.location, r.metric)
+                    current = latest.get(key)
+                    if current is None or r.timestamp >= current.timestamp:
+                        latest[key] = r
+
                 upsert_sql = """
                     INSERT INTO current_readings
                     (sensor_id, location, metric, metric_type, value, timestamp, source_type, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
                     ON DUPLICATE KEY UPDATE
                         value = VALUES(value),
                         timestamp = VALUES(timestamp),
                         source_type = VALUES(source_type),
-                        updated_at = NOW()
+                        updated_at = VALUES(updated_at)
                 """
-                for r in readings:
-                    cursor.execute(
-                        upsert_sql,
+                updated_at = datetime.now()
+                cursor.executemany(
+                    upsert_sql,
+                    (
                         (
                             r.sensor_id,
                             r.location,
@@ -136,10 +412,14 @@ class ReadingsStorage:
                             r.value,
                             r.timestamp,
                             r.source_type,
-                        ),
-                    )
+                            updated_at,
+                        )
+                        for r in latest.values()
+                    ),
+                )
 
             conn.commit()
+            touch_readings_sentinel()
             return True
         except Exception as e:
             logger.error(f"Error storing readings: {e}")
@@ -154,6 +434,8 @@ class ReadingsStorage:
         metric: Optional[str] = None,
         metrics: Optional[List[str]] = None,
         max_age_seconds: Optional[int] = None,
+        exclude_null: bool = False,
+        limit: Optional[int] = None,
     ) -> List[Reading]:
         """Get current readings with optional filters.
 
@@ -164,65 +446,82 @@ class ReadingsStorage:
             metric: Filter by single metric name.
             metrics: Filter by multiple metric names (OR).
             max_age_seconds: Only return readings newer than this many seconds.
+            exclude_null: Skip readings whose value is NULL or the string 'null'.
+            limit: Maximum number of readings to return.
 
         Returns:
             List of matching readings.
         """
         conn = self._get_connection()
 
-        conditions = []
         params: List = []
 
         if source_type:
-            conditions.append("source_type = %s")
             params.append(source_type)
         if location:
-            conditions.append("location = %s")
-            params.append(location)
-        elif locations:
-            placeholders = ", ".join(["%s"] * len(locations))
-            conditions.append(f"location IN ({placeholders})")
+            locations = [location]
+        if locations:
             params.extend(locations)
         if metric:
-            conditions.append("metric = %s")
-            params.append(metric)
-        elif metrics:
-            placeholders = ", ".join(["%s"] * len(metrics))
-            conditions.append(f"metric IN ({placeholders})")
+            metrics = [metric]
+        if metrics:
             params.extend(metrics)
         if max_age_seconds:
-            cutoff = datetime.now() - timedelta(seconds=max_age_seconds)
-            conditions.append("timestamp >= %s")
-            params.append(cutoff)
+            params.append(datetime.now() - timedelta(seconds=max_age_seconds))
+        if limit is not None:
+            params.append(limit)
+
+        query = _current_readings_sql(
+            bool(source_type),
+            len(locations) if locations else 0,
+            len(metrics) if metrics else 0,
+            bool(max_age_seconds),
+            exclude_null,
+            limit is not None,
+        )
 
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        try:
+            with conn.cursor(Cursor) as cursor:
+                cursor.execute(query, params)
+                return [Reading(*row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error fetching current readings: {e}")
+            return []
 
-        query = f"""
-            SELECT timestamp, source_type, sensor_id, location, metric, metric_type, value
-            FROM current_readings
-            WHERE {where_clause}
-            ORDER BY location, metric
+    def get_current_readings_multi(
+        self,
+        specs: List[Tuple[List[str], List[str]]],
+        exclude_null: bool = False,
+    ) -> Dict[Tuple[str, str], Reading]:
+        """Get current readings for several location/metric sets in one query.
+
+        Args:
+            specs: (locations, metrics) pairs; a reading matches if it is in
+                any pair's locations and that same pair's metrics.
+            exclude_null: Skip readings whose value is NULL or the string 'null'.
+
+        Returns:
+            Matching readings keyed by (location, metric).
         """
+        if not specs:
+            return {}
+
+        conn = self._get_connection()
+
+        params: List = []
+        for locations, metrics in specs:
+            params.extend(locations)
+            params.extend(metrics)
+        shape = tuple((len(locations), len(metrics)) for locations, metrics in specs)
+        query = _current_readings_multi_sql(shape, exclude_null)
 
         try:
-            with conn.cursor() as cursor:
+            with conn.cursor(Cursor) as cursor:
                 cursor.execute(query, params)
-                rows = cursor.fetchall()
-                return [
-                    Reading(
-                        timestamp=row["timestamp"],
-                        source_type=row["source_type"],
-                        sensor_id=row["sensor_id"],
-                        location=row["location"],
-                        metric=row["metric"],
-                        metric_type=row["metric_type"],
-                        value=row["value"],
-                    )
-                    for row in rows
-                ]
+                return {(row[3], row[4]): Reading(*row) for row in cursor.fetchall()}
         except Exception as e:
             logger.error(f"Error fetching current readings: {e}")
-            return []
+            return {}
 
     def get_historical_readings(
         self,
@@ -231,6 +530,8 @@ class ReadingsStorage:
         location: Optional[str] = None,
         metric: Optional[str] = None,
         limit: int = 1000,
+        locations: Optional[List[str]] = None,
+        metrics: Optional[List[str]] = None,
     ) -> List[Reading]:
         """Get historical readings within a time range.
 
@@ -240,53 +541,66 @@ class ReadingsStorage:
             location: Filter by location.
             metric: Filter by metric name.
             limit: Maximum number of readings to return.
+            locations: Filter by any of several locations, in one query.
+            metrics: Filter by any of several metric names, in one query.
 
         Returns:
             List of matching readings.
         """
         conn = self._get_connection()
-        end_time = end_time or datetime.now()
+        query, params = _historical_query(
+            start_time, end_time, location, metric, limit, locations, metrics
+        )
 
-        conditions = ["timestamp BETWEEN %s AND %s"]
-        params: List = [start_time, end_time]
+        try:
+            with conn.cursor(Cursor) as cursor:
+                cursor.execute(query, params)
+                return [Reading(*row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error fetching historical readings: {e}")
+            return []
 
-        if location:
-            conditions.append("location = %s")
-            params.append(location)
-        if metric:
-            conditions.append("metric = %s")
-            params.append(metric)
+    def iter_historical_readings(
+        self,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        location: Optional[str] = None,
+        metric: Optional[str] = None,
+        limit: int = 1000,
+        locations: Optional[List[str]] = None,
+        metrics: Optional[List[str]] = None,
+    ) -> Iterator[Reading]:
+        """Stream historical readings within a time range, newest first.
 
-        where_clause = " AND ".join(conditions)
+        Takes the same filters as get_historical_readings, but rows are read
+        from the server as they are consumed instead of being loaded all at
+        once, so memory stays bounded for large limits. The connection can't
+        run other queries until the iterator is exhausted or closed.
 
-        query = f"""
-            SELECT timestamp, source_type, sensor_id, location, metric, metric_type, value
-            FROM sensor_readings
-            WHERE {where_clause}
-            ORDER BY timestamp DESC
-            LIMIT %s
+        Args:
+            start_time: Start of time range.
+            end_time: End of time range (defaults to now).
+            location: Filter by location.
+            metric: Filter by metric name.
+            limit: Maximum number of readings to return.
+            locations: Filter by any of several locations, in one query.
+            metrics: Filter by any of several metric names, in one query.
+
+        Yields:
+            Matching readings. Errors are logged and end the iteration early.
         """
-        params.append(limit)
+        conn = self._get_connection()
+        query, params = _historical_query(
+            start_time, end_time, location, metric, limit, locations, metrics
+        )
 
         try:
-            with conn.cursor() as cursor:
+            with conn.cursor(SSCursor) as cursor:
                 cursor.execute(query, params)
-                rows = cursor.fetchall()
-                return [
-                    Reading(
-                        timestamp=row["timestamp"],
-                        source_type=row["source_type"],
-                        sensor_id=row["sensor_id"],
-                        location=row["location"],
-                        metric=row["metric"],
-                        metric_type=row["metric_type"],
-                        value=row["value"],
-                    )
-                    for row in rows
-                ]
+                for row in cursor:
+                    yield Reading(*row)
         except Exception as e:
-            logger.error(f"Error fetching historical readings: {e}")
-            return []
+            logger.error(f"Error streaming historical readings: {e}")
 
     def get_latest_reading(
         self,
@@ -302,7 +616,7 @@ class ReadingsStorage:
         Returns:
             The latest reading, or None if not found.
         """
-        readings = self.get_current_readings(location=location, metric=metric)
+        readings = self.get_current_readings(location=location, metric=metric, limit=1)
         return readings[0] if readings else None
 
     def close(self):
@@ -6,11 +6,19 @@ cryptic MySQL errors when disk is full.
 
 import logging
 import shutil
+import time
 
 logger = logging.getLogger(__name__)
 
 CRITICAL_THRESHOLD_PERCENT = 95
 
+# Seconds a disk usage result is reused; usage changes far slower than
+# services write, so per-write guards needn't each statvfs the filesystem
+DISK_USAGE_TTL = 5.0
+
+# Last disk usage per path, as (monotonic time checked, result)
+_usage_cache: dict[str, tuple[float, tuple[int, int, float]]] = {}
+
 
 class DiskFullError(Exception):
     """Raised when disk is too full to safely write data."""
@@ -21,15 +29,24 @@ class DiskFullError(Exception):
 def get_disk_usage(path: str = "/") -> tuple[int, int, float]:
     """Get disk usage for the given path.
 
+    Results are reused for DISK_USAGE_TTL seconds.
+
     Args:
         path: Filesystem path to check.
 
     Returns:
         Tuple of (used_bytes, total_bytes, percent_used)
     """
+    now = time.monotonic()
+    cached = _usage_cache.get(path)
+    if cached is not None and now - cached[0] < DISK_USAGE_TTL:
+        return cached[1]
+
     usage = shutil.disk_usage(path)
     percent = (usage.used / usage.total) * 100
-    return usage.used, usage.total, percent
+    result = (usage.used, usage.total, percent)
+    _usage_cache[path] = (now, result)
+    return result
 
 
 def check_disk_space(
@@ -22,14 +22,17 @@ def setup_logging(
     # Convert string to logging level
     log_level = getattr(logging, level.upper(), logging.INFO)
 
+    # force replaces any handlers installed earlier (e.g. by an imported
+    # library), which would otherwise make basicConfig a silent no-op
     logging.basicConfig(
         level=log_level,
         format=format_string,
+        force=True,
     )
 
     # Quiet down verbose third-party loggers
     default_quiet = ["bleak", "asyncio"]
-    quiet_loggers = (quiet_loggers or []) + default_quiet
+    quiet_loggers = set(quiet_loggers or []).union(default_quiet)
 
     for logger_name in quiet_loggers:
         logging.getLogger(logger_name).setLevel(logging.WARNING)
@@ -11,6 +11,8 @@ class Reading:
 
     All values are stored as strings for flexibility in the database.
     """
+    __slots__ = ("timestamp", "source_type", "sensor_id", "location", "metric", "metric_type", "value")
+
     timestamp: datetime
     source_type: str
     sensor_id: str
@@ -21,12 +23,13 @@ class Reading:
 
     def is_valid(self) -> bool:
         """Check if the reading has a valid value."""
-        return self.value is not None and self.value.lower() != 'null'
+        value = self.value
+        # Only four-character values can spell 'null', so most skip the lower()
+        return value is not None and (len(value) != 4 or value.lower() != 'null')
 
     def as_float(self) -> Optional[float]:
         """Try to convert value to float, return None if not possible."""
-        if not self.is_valid():
-            return None
+        # float() already rejects None and any spelling of 'null'
         try:
             return float(self.value)
         except (ValueError, TypeError):
@@ -1,13 +1,18 @@
 """MQTT configuration and utilities."""
 
-import json
 import logging
 import time
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Union
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# First characters of payloads that are JSON objects, arrays or strings,
+# as received (bytes) or decoded (str)
+_JSON_OPENERS = frozenset(("{", "[", '"', b"{", b"[", b'"'))
+
 
 @dataclass
 class MQTTConfig:
@@ -35,7 +40,7 @@ def create_sensor_payload(
     unit: str,
     sensor_id: str,
     timestamp: Optional[float] = None,
-) -> str:
+) -> bytes:
     """Create a standardized MQTT payload for sensor readings.
 
     Args:
@@ -45,33 +50,41 @@ def create_sensor_payload(
         timestamp: Unix timestamp (defaults to current time).
 
     Returns:
-        JSON string payload.
+        JSON payload as UTF-8 bytes, ready to publish.
     """
-    return json.dumps({
+    return orjson.dumps({
         "value": value,
         "unit": unit,
-        "ts": timestamp or time.time(),
+        "ts": time.time() if timestamp is None else timestamp,
         "sensor": sensor_id,
     })
 
 
-def parse_sensor_payload(payload: str) -> Optional[Dict[str, Any]]:
+def parse_sensor_payload(payload: Union[str, bytes]) -> Optional[Dict[str, Any]]:
     """Parse a sensor payload from MQTT message.
 
     Args:
-        payload: JSON string or plain value.
+        payload: JSON or plain value, as received bytes or a string.
 
     Returns:
         Dictionary with 'value', 'unit', 'ts', 'sensor' keys,
         or None if parsing fails.
     """
+    # Many sensors publish a bare number; convert it without a JSON round trip
+    stripped = payload.strip()
+    if stripped[:1] not in _JSON_OPENERS:
+        try:
+            return {"value": float(stripped), "unit": None, "ts": time.time(), "sensor": None}
+        except ValueError:
+            pass
+
     try:
-        data = json.loads(payload)
+        data = orjson.loads(payload)
         if isinstance(data, dict):
             return data
         # Plain numeric value
         return {"value": float(data), "unit": None, "ts": time.time(), "sensor": None}
-    except (json.JSONDecodeError, ValueError, TypeError):
+    except (orjson.JSONDecodeError, ValueError, TypeError):
         # Try plain numeric
         try:
             return {"value": float(payload), "unit": None, "ts": time.time(), "sensor": None}
@@ -1,29 +1,65 @@
-"""MQTT publisher for BLE sensor data."""
+"""MQTT publisher for sensor data, shared by services that publish readings."""
 
-import json
+import functools
 import logging
 import threading
 import time
-from typing import Optional
+from typing import Iterable, List, Optional, Tuple, Union
 
+import orjson
 import paho.mqtt.client as mqtt
 from paho.mqtt.enums import CallbackAPIVersion
 
-from .config import MQTTConfig
+from .mqtt import MQTTConfig
 
 logger = logging.getLogger(__name__)
 
+# Payload {"value":..,"unit":..,"ts":..,"sensor":..} is assembled from bytes:
+# VALUE_PREFIX + value + <unit fragment> + ts + <sensor fragment>
+VALUE_PREFIX = b'{"value":'
+
+# (topic, unit fragment, sensor fragment) for one sensor reading stream
+PayloadProfile = Tuple[str, bytes, bytes]
+
+# Upper bound on cached payload profiles; sensor IDs come from BLE discovery,
+# so the set of streams is not known up front and must not grow without limit
+MAX_PAYLOAD_PROFILES = 1024
+
+
+@functools.lru_cache(maxsize=MAX_PAYLOAD_PROFILES)
+def _get_profile(
+    building: str,
+    system: str,
+    location: str,
+    metric: str,
+    unit: str,
+    sensor_id: str,
+) -> PayloadProfile:
+    """Get the pre-encoded topic and payload fragments for a sensor stream.
+
+    Everything except value and ts is constant per stream, so it is
+    encoded once on the first reading and reused afterwards.
+    """
+    return (
+        f"{building}/{system}/{location}/{metric}",
+        b',"unit":' + orjson.dumps(unit) + b',"ts":',
+        b',"sensor":' + orjson.dumps(sensor_id) + b"}",
+    )
+
 
 class MQTTPublisher:
     """Publishes sensor readings to MQTT broker."""
 
-    def __init__(self, config: MQTTConfig):
+    def __init__(self, config: MQTTConfig, auto_reconnect: bool = False):
         """Initialize MQTT publisher.
 
         Args:
             config: MQTT configuration.
+            auto_reconnect: Let paho's network thread reconnect after the broker
+                drops the connection, instead of leaving that to the caller.
         """
         self.config = config
+        self.auto_reconnect = auto_reconnect
         self.client: Optional[mqtt.Client] = None
         self._connected = False
         self._connect_event = threading.Event()
@@ -62,7 +98,7 @@ class MQTTPublisher:
         self.client = mqtt.Client(
             callback_api_version=CallbackAPIVersion.VERSION2,
             client_id=self.config.client_id,
-            reconnect_on_failure=False,  # We'll handle reconnection manually
+            reconnect_on_failure=self.auto_reconnect,
         )
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
@@ -102,6 +138,7 @@ class MQTTPublisher:
         value: float,
         unit: str,
         sensor_id: str,
+        ts: Optional[float] = None,
     ):
         """Publish a sensor reading to MQTT.
 
@@ -113,25 +150,57 @@ class MQTTPublisher:
             value: The sensor value.
             unit: Unit of measurement (e.g., "C").
             sensor_id: Sensor identifier (e.g., "ST-FLORIAN-2").
+            ts: Reading timestamp; defaults to now. Pass a shared value when
+                publishing a batch of readings.
         """
         if not self._connected or not self.client:
             logger.warning("Not connected to MQTT broker, cannot publish")
             return
 
-        topic = f"{building}/{system}/{location}/{metric}"
-        payload = json.dumps({
-            "value": value,
-            "unit": unit,
-            "ts": time.time(),
-            "sensor": sensor_id,
-        })
+        topic, unit_part, sensor_part = _get_profile(
+            building, system, location, metric, unit, sensor_id
+        )
+        payload = (
+            VALUE_PREFIX
+            + orjson.dumps(value)
+            + unit_part
+            + orjson.dumps(time.time() if ts is None else ts)
+            + sensor_part
+        )
 
         result = self.client.publish(topic, payload, qos=1)
         if result.rc == mqtt.MQTT_ERR_SUCCESS:
-            logger.debug(f"Published to {topic}: {payload}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Published to %s: %s", topic, payload)
         else:
             logger.warning(f"Failed to publish to {topic}: rc={result.rc}")
 
+    def publish_messages(
+        self, messages: Iterable[Tuple[str, Union[str, bytes]]], qos: int = 0
+    ) -> List[Tuple[str, int]]:
+        """Publish already-encoded messages to MQTT.
+
+        Args:
+            messages: (topic, payload) pairs.
+            qos: QoS level for every message.
+
+        Returns:
+            (topic, rc) for each message that could not be queued; every
+            message fails with MQTT_ERR_NO_CONN while disconnected.
+        """
+        client = self.client
+        if not self._connected or client is None:
+            return [(topic, mqtt.MQTT_ERR_NO_CONN) for topic, _ in messages]
+
+        publish = client.publish
+        ok = mqtt.MQTT_ERR_SUCCESS
+        failed = []
+        for topic, payload in messages:
+            rc = publish(topic, payload, qos=qos).rc
+            if rc != ok:
+                failed.append((topic, rc))
+        return failed
+
     @property
     def is_connected(self) -> bool:
         """Check if connected to MQTT broker."""
@@ -14,6 +14,7 @@ setup(
         "pyyaml",
         "python-dotenv",
         "paho-mqtt>=2.0.0",
+        "orjson>=3.10",
         "python-kasa",
         "bleak",
         "aiohttp",